@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from dictionaries import prefixes, suffixes, stressed_suffixes, all_clust
+
+
+class AffixTrie(object):
+    """
+    Represents a set of affixes as a character trie, for finding the longest affix
+    at the start (or, if reverse, at the end) of a string.
+    """
+    def __init__(self, affixes, reverse=False):
+        """
+        affixes: iterable of affix strings
+        reverse: if True, the trie is built over reversed affixes and matches at the end of strings
+        self.root: nested dicts, one per trie node, keyed by character. A node containing the key None is the end of an affix.
+        """
+        self.reverse = reverse
+        self.root = {}
+        for affix in affixes:
+            if affix == '':
+                continue
+            node = self.root
+            for char in (reversed(affix) if reverse else affix):
+                node = node.setdefault(char, {})
+            node[None] = True
+
+    def longest(self, string):
+        """
+        Returns the longest affix that string starts (or, if reverse, ends) with, or '' if none does.
+        """
+        node = self.root
+        length = 0
+        i = 0
+        for char in (reversed(string) if self.reverse else string):
+            node = node.get(char)
+            if node is None:
+                break
+            i += 1
+            if None in node:
+                length = i
+        if length == 0:
+            return ''
+        if self.reverse:
+            return string[-length:]
+        return string[:length]
+
+
+prefix_matcher = AffixTrie(prefixes)
+suffix_matcher = AffixTrie(suffixes, reverse=True)
+stressed_suffix_matcher = AffixTrie(stressed_suffixes, reverse=True)
+cluster_start_matcher = AffixTrie(all_clust)
+cluster_end_matcher = AffixTrie(all_clust, reverse=True)
@@ -0,0 +1,209 @@
+"""
+Transcribes many files (or one large file) on several cores.
+
+Input is read in chunks of lines (or paragraphs), each chunk is transcribed by a worker
+in a multiprocessing pool, and the results are written back in input order.
+The lexicon and Wiktionary table are loaded before the pool forks, so workers share them.
+
+    python batch.py [-j WORKERS] [--chunk-size N] [--paragraphs] [--dict | --format jsonl|tsv] [--cache DB]
+                    [--stdout] FILE...
+    python batch.py --words [-j WORKERS] [--cache DB] [--stdout] FILE...
+
+With --cache, words the rules transcribe are kept in the sqlite file DB (see word_store.py) and read back
+by later runs; every worker reads and writes it.
+With several workers, words the rules transcribe are also shared between the workers as they go, through
+--shared-cache MB of shared memory (see shared_cache.py; 0 turns it off). --stats prints its counters at the end.
+
+With --format, a record is written for each word instead of aligned lines (see text.write_records),
+with line numbers and character offsets counted from the start of its file.
+
+With --words, each input file is a word list (one word per line) and each output line is word<TAB>ipa;
+every distinct word is transcribed once, however often it repeats. Words the rules fail on get an empty ipa.
+"""
+import argparse
+import io
+import multiprocessing
+import sys
+from collections import deque
+
+from shared_cache import default_size, shared_cache
+from text import Text, record_fields, transcribe_words, write_records
+from wiktionary import wiktionary
+from word_store import word_store
+
+
+def transcribe_chunk(chunk):
+    """
+    chunk: a (dict_format, lines) tuple, where lines is a list of unicode lines,
+        or an (output_format, lines, number, offset) tuple to write a record per word
+        of lines numbered from number and at offset characters into their file
+    Returns the transcription of every line, formatted and utf-8 encoded, as one string.
+    """
+    if len(chunk) == 4:
+        output_format, lines, number, offset = chunk
+        block = io.BytesIO()
+        write_records(Text.iter_records(lines, number, offset), block, output_format, header=False)
+        return block.getvalue()
+    dict_format, lines = chunk
+    each_line = Text.iter_lines(lines)
+    if dict_format:
+        return u''.join(line.format_dict_ipa() for line in each_line).encode('utf-8')
+    return u''.join(line.format_ipa() for line in each_line).encode('utf-8')
+
+
+def read_chunks(fileobj, chunk_size=500, paragraphs=False):
+    """
+    Yields lists of unicode lines read from fileobj.
+    Each list holds chunk_size lines, or chunk_size paragraphs (ending at a blank line) if paragraphs is True.
+    """
+    chunk = []
+    count = 0
+    for line in fileobj:
+        line = line.decode('utf8')
+        chunk.append(line)
+        if paragraphs:
+            if line.strip() == '':
+                count += 1
+        else:
+            count += 1
+        if count >= chunk_size:
+            yield chunk
+            chunk = []
+            count = 0
+    if chunk:
+        yield chunk
+
+
+def ordered_map(pool, function, iterable, window):
+    """
+    Like pool.imap, but keeps at most window items in flight, so a huge input is never
+    read far ahead of the output. Yields results in input order.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def record_chunks(chunks, output_format):
+    """
+    Yields an (output_format, lines, number, offset) work unit for each list of lines of chunks,
+    numbering lines and counting offsets across the whole sequence.
+    """
+    number = 0
+    offset = 0
+    for chunk in chunks:
+        yield output_format, chunk, number, offset
+        text = u''.join(chunk)
+        number += len(text.splitlines())
+        offset += len(text)
+
+
+def share(size):
+    """
+    Creates the shared_cache with size bytes, before the workers are forked (0 leaves it off).
+    """
+    if size and shared_cache.buffer is None:
+        shared_cache.create(size)
+
+
+def transcribe_files(paths, outputs, workers=None, chunk_size=500, paragraphs=False, dict_format=False,
+                     output_format=None, shared_cache_size=default_size):
+    """
+    paths: list of input file paths
+    outputs: function taking an input path and returning the file object to write its transcription to
+    workers: number of worker processes (defaults to the number of cores); 1 transcribes in this process
+    output_format: if 'jsonl' or 'tsv', a record is written for each word instead (see text.write_records)
+    shared_cache_size: bytes of shared memory for the workers to share their transcriptions in (0: none)
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    # load the shared data before forking so every worker inherits it
+    wiktionary.open()
+
+    pool = None
+    if workers > 1:
+        share(shared_cache_size)
+        pool = multiprocessing.Pool(workers)
+    try:
+        for path in paths:
+            out = outputs(path)
+            with open(path) as f:
+                if output_format is None:
+                    chunks = ((dict_format, chunk) for chunk in read_chunks(f, chunk_size, paragraphs))
+                else:
+                    if output_format == 'tsv':
+                        out.write('\t'.join(record_fields) + '\n')
+                    chunks = record_chunks(read_chunks(f, chunk_size, paragraphs), output_format)
+                if pool is None:
+                    results = (transcribe_chunk(chunk) for chunk in chunks)
+                else:
+                    results = ordered_map(pool, transcribe_chunk, chunks, workers * 4)
+                for result in results:
+                    out.write(result)
+            if out is not sys.stdout:
+                out.close()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def transcribe_word_lists(paths, outputs, workers=None, shared_cache_size=default_size):
+    """
+    paths: list of input word list files (utf-8, one word per line)
+    outputs: function taking an input path and returning the file object to write its transcription to
+    workers: number of worker processes (defaults to the number of cores)
+    shared_cache_size: bytes of shared memory for the workers to share their transcriptions in (0: none)
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    wiktionary.open()
+    if workers > 1:
+        share(shared_cache_size)
+    for path in paths:
+        with open(path) as f:
+            words = [line.strip().decode('utf8') for line in f]
+        words = [word for word in words if word != '']
+        out = outputs(path)
+        for word, ipa in zip(words, transcribe_words(words, workers, default=u'')):
+            out.write((word + u'\t' + ipa + u'\n').encode('utf-8'))
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe German text files to IPA on several cores.")
+    parser.add_argument('files', nargs='+', help="input files (utf-8)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="lines (or paragraphs) per work unit")
+    parser.add_argument('--paragraphs', action='store_true', help="count chunk size in paragraphs instead of lines")
+    parser.add_argument('--dict', action='store_true', help="tab-separated output, as printed by ipa_print.py")
+    parser.add_argument('--format', choices=['jsonl', 'tsv'], default=None,
+                        help="write a record per word (offsets, ipa, its source and parts) as json lines or tsv")
+    parser.add_argument('--words', action='store_true', help="input files are word lists; write word<TAB>ipa per line")
+    parser.add_argument('--cache', default=None, help="sqlite file keeping transcriptions between runs")
+    parser.add_argument('--shared-cache', type=int, default=default_size >> 20, metavar='MB',
+                        help="shared memory for the workers' transcriptions (default: %d; 0 turns it off)" % (
+                            default_size >> 20))
+    parser.add_argument('--stats', action='store_true', help="print the shared cache counters to stderr when done")
+    parser.add_argument('--stdout', action='store_true', help="write everything to stdout instead of FILE.ipa")
+    args = parser.parse_args()
+
+    word_store.enable(args.cache)
+    if args.stdout:
+        outputs = lambda path: sys.stdout
+    else:
+        outputs = lambda path: open(path + '.ipa', 'w')
+    size = args.shared_cache << 20
+    if args.words:
+        transcribe_word_lists(args.files, outputs, args.workers, size)
+    else:
+        transcribe_files(args.files, outputs, args.workers, args.chunk_size, args.paragraphs, args.dict,
+                         args.format, size)
+    if args.stats:
+        sys.stderr.write(shared_cache.report() + '\n')
@@ -0,0 +1,31 @@
+"""
+Measures Line alignment on very long lines: time per word should not grow with the length of the line.
+Every word's ipa is precomputed, so only the alignment is timed.
+
+    python bench/bench_align.py [max words]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import wordlist_path
+from text import Line, transcribe_words
+
+
+if __name__ == "__main__":
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with open(wordlist_path) as f:
+        words = [line.strip().decode('utf8') for line in f if not line.startswith('#')][:2000]
+    ipas = dict(zip(words, transcribe_words(words, default=u'')))
+    rand = random.Random(0)
+    count = 1000
+    while count <= largest:
+        line = u' '.join(rand.choice(words) + rand.choice([u'', u',', u'.']) for i in range(count))
+        start = time.time()
+        Line(line, ipas)
+        elapsed = time.time() - start
+        print '%7d words  %8.3f s  %6.2f us/word' % (count, elapsed, elapsed / count * 1e6)
+        count *= 10
@@ -0,0 +1,59 @@
+"""
+Measures how batch transcription scales with the number of worker processes.
+
+    python bench/bench_batch.py [lines] [max workers]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import transcribe_files
+from lexicon import wordlist_path
+from text import Word, word_cache
+
+
+def write_corpus(path, lines, seed=0):
+    """
+    Writes lines of ten random words each, drawn from the first 20000 words of the word list
+    (leaving out the few that the rules can't transcribe).
+    """
+    with open(wordlist_path) as f:
+        words = [line.strip() for line in f if not line.startswith('#')][:20000]
+    for word in list(words):
+        try:
+            Word(word.decode('utf8'))
+        except IndexError:
+            words.remove(word)
+    rand = random.Random(seed)
+    with open(path, 'w') as f:
+        for i in range(lines):
+            f.write(' '.join(rand.choice(words) for j in range(10)) + '\n')
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+    directory = tempfile.mkdtemp()
+    corpus = os.path.join(directory, 'corpus.txt')
+    write_corpus(corpus, lines)
+    print 'corpus: %d lines, %d words, %d cores' % (lines, lines * 10, multiprocessing.cpu_count())
+
+    workers = 1
+    single = None
+    while workers <= max_workers:
+        # start each run cold: forked workers would otherwise inherit the words cached by the previous run
+        word_cache.clear()
+        start = time.time()
+        transcribe_files([corpus], lambda path: open(os.devnull, 'w'), workers)
+        elapsed = time.time() - start
+        single = single or elapsed
+        print '%3d workers: %8.0f words/sec  speedup %.2fx' % (workers, lines * 10 / elapsed, single / elapsed)
+        workers *= 2
+
+    os.remove(corpus)
+    os.rmdir(directory)
@@ -0,0 +1,47 @@
+"""
+Measures Text.update after a one-character edit against building the whole Text again.
+
+    python bench/bench_incremental.py [lines]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpora import prose
+from text import Line, Text, word_cache
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    lines = []
+    for line in prose(count):
+        # leave out the few lines with words the rules can't transcribe
+        try:
+            Line(line)
+        except IndexError:
+            continue
+        lines.append(line)
+    document = u'\n'.join(lines)
+
+    # an edit in the middle of the document: one character typed into one line
+    middle = len(lines) // 2
+    edited = list(lines)
+    edited[middle] = edited[middle][:5] + u'e' + edited[middle][5:]
+    edited = u'\n'.join(edited)
+
+    word_cache.clear()
+    text, first = timed(Text, document)
+    print '%d lines: first Text %.1f ms (%d lines built)' % (len(lines), first * 1000, text.recomputed)
+    rebuilt, full = timed(Text, edited)
+    print 'edit, whole new Text:  %8.1f ms (%d lines built)' % (full * 1000, rebuilt.recomputed)
+    built, update = timed(text.update, edited)
+    print 'edit, Text.update:     %8.1f ms (%d lines built)' % (update * 1000, built)
+    assert [line.ipa for line in text.each_line] == [line.ipa for line in rebuilt.each_line]
@@ -0,0 +1,57 @@
+"""
+Measures exporting a document as records (json lines and tsv, no alignment) against the aligned
+tab-separated output of print_dict_ipa, with every word already in the word cache (made large enough
+for the whole vocabulary), so only building the Lines and writing the output are timed.
+
+    python bench/bench_records.py [lines]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpora import prose
+from text import Line, Text, word_cache, write_records
+
+
+def aligned(document, out):
+    for line in Text(document).each_line:
+        out.write(line.format_dict_ipa().encode('utf-8'))
+
+
+def records(output_format):
+    def export(document, out):
+        write_records(Text(document, align=False).records(), out, output_format)
+    return export
+
+
+def best(function, document, runs=3):
+    times = []
+    with open(os.devnull, 'w') as out:
+        for i in range(runs):
+            start = time.time()
+            function(document, out)
+            times.append(time.time() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    word_cache.resize(1000000)
+    lines = []
+    for line in prose(count):
+        # leave out the few lines with words the rules can't transcribe
+        try:
+            Line(line)
+        except IndexError:
+            continue
+        lines.append(line)
+    document = u'\n'.join(lines)
+    words = sum(1 for record in Text(document, align=False).records())
+
+    print '%d lines, %d words' % (len(lines), words)
+    for name, function in [('aligned dict', aligned), ('jsonl', records('jsonl')), ('tsv', records('tsv'))]:
+        seconds = best(function, document)
+        print '%-14s %8.1f ms %10.0f words/sec' % (name, seconds * 1000, words / seconds)
@@ -0,0 +1,65 @@
+"""
+Micro-benchmarks the fragment rule engine: Root.ipa_rule over every Root of a word corpus.
+Reports the cost per Root and per fragment.
+
+    python bench/bench_rules.py [words] [repeats]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import wordlist_path
+from part import Root
+from text import Word
+
+
+def collect_roots(count):
+    """
+    Returns (word, index, ipa) for every Root in the first count transcribable words of the word list,
+    where ipa is the list of ipa strings of the Parts before the Root.
+    """
+    roots = []
+    with open(wordlist_path) as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            try:
+                word = Word(line.rstrip().decode('utf8'))
+            except IndexError:
+                continue
+            ipa = []
+            for i in range(word.length):
+                if isinstance(word.each_part[i], Root):
+                    roots.append((word, i, list(ipa)))
+                ipa.append(word.each_part[i].ipa_rule(word.finalstress, ipa, word.each_part, word.length, i))
+            count -= 1
+            if count == 0:
+                break
+    return roots
+
+
+def time_roots(roots, repeats):
+    """
+    Returns the best time over repeats of applying Root.ipa_rule to every root.
+    """
+    best = None
+    for r in range(repeats):
+        start = time.time()
+        for word, i, ipa in roots:
+            word.each_part[i].ipa_rule(word.finalstress, ipa, word.each_part, word.length, i)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    roots = collect_roots(count)
+    frags = sum(word.each_part[i].length for word, i, ipa in roots)
+    elapsed = time_roots(roots, repeats)
+    print '%d roots, %d fragments' % (len(roots), frags)
+    print 'Root.ipa_rule: %6.2f us/root  %6.2f us/fragment  %9.0f fragments/sec' % (
+        elapsed / len(roots) * 1e6, elapsed / frags * 1e6, frags / elapsed)
@@ -0,0 +1,66 @@
+"""
+Measures worker processes transcribing overlapping traffic with and without the shared cache.
+
+The traffic is Zipf-distributed over a vocabulary of compounds (see bench_warmup.py), cut into chunks that a
+pool of workers transcribes word by word, each worker with its own word cache, as batch.py does.
+Reports the time of each run and the shared cache's counters.
+
+    python bench/bench_shared.py [tokens] [workers]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_warmup import traffic
+from corpora import long_compounds
+from shared_cache import shared_cache
+from text import word_ipa
+from wiktionary import wiktionary
+
+
+def transcribe_chunk(chunk):
+    """
+    Returns the ipas of chunk.
+    """
+    return [word_ipa(token, u'') for token in chunk]
+
+
+def run(chunks, workers):
+    """
+    Returns (seconds, list of ipas).
+    """
+    pool = multiprocessing.Pool(workers)
+    try:
+        start = time.time()
+        results = pool.map(transcribe_chunk, chunks, 1)
+        seconds = time.time() - start
+    finally:
+        pool.close()
+        pool.join()
+    ipas = [ipa for found in results for ipa in found]
+    return seconds, ipas
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    vocabulary = long_compounds(10000)
+    random.Random(0).shuffle(vocabulary)
+    tokens = traffic(vocabulary, count, seed=3)
+    chunks = [tokens[i:i + 500] for i in range(0, len(tokens), 500)]
+    print '%d words, %d distinct, %d workers' % (count, len(set(tokens)), workers)
+    wiktionary.open()
+
+    seconds, private = run(chunks, workers)
+    print 'own caches only   %6.2f s' % seconds
+
+    shared_cache.create()
+    seconds, shared = run(chunks, workers)
+    print 'shared cache      %6.2f s' % seconds
+    print shared_cache.report()
+    assert private == shared
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks split.split_word on a corpus of long compound words.
+Compares the current Lexicon-backed splitter against the old list-backed splitter.
+
+    python bench/bench_split.py [number of words]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import wordlist_path
+from split import language, split_word
+
+compounds = [u"donaudampfschifffahrtsgesellschaft", u"bahnhofsvorsteher", u"kindergartenplatz",
+             u"rindfleischetikettierungsüberwachungsaufgabenübertragungsgesetz",
+             u"haustürschlüssel", u"weltmeisterschaftsspiel", u"xyzqwertzuiopasdfghjkl"]
+
+
+def long_compounds(count, seed=0):
+    """
+    Returns count lowercase compounds built from two to four random Lexicon words.
+    """
+    rand = random.Random(seed)
+    words = sorted(word for word in language.words() if len(word) > 3)
+    corpus = list(compounds)
+    while len(corpus) < count:
+        corpus.append(u''.join(rand.choice(words) for i in range(rand.randint(2, 4))))
+    return corpus[:count]
+
+
+def legacy_split_word(word, words):
+    """
+    The original splitter, which scans the whole word list for every slice of word.
+    """
+    for i in range(len(word)):
+        if word[:i] in words:
+            if word[i:] in words:
+                return [word[:i], word[i:]]
+            else:
+                split = legacy_split_word(word[i:], words)
+                if len(split) > 1:
+                    return [word[:i]] + split
+    return [word]
+
+
+def words_per_second(function, corpus):
+    start = time.time()
+    for word in corpus:
+        function(word)
+    return len(corpus) / (time.time() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = long_compounds(count)
+    with open(wordlist_path) as f:
+        words = [line.rstrip().decode('utf8') for line in f]
+    legacy_corpus = corpus[:max(1, count // 100)]
+    for word in legacy_corpus:
+        assert legacy_split_word(word, words) == split_word(word), word
+    print 'corpus: %d compounds, mean length %.1f' % (len(corpus), sum(map(len, corpus)) / float(len(corpus)))
+    print 'list      split_word: %10.1f words/sec' % words_per_second(lambda w: legacy_split_word(w, words), legacy_corpus)
+    for rule in ('first', 'fewest', 'longest', 'frequency'):
+        print '%-9s split_word: %10.1f words/sec' % (rule, words_per_second(lambda w: split_word(w, rule), corpus))
@@ -0,0 +1,41 @@
+"""
+Measures cold-start cost: each snippet runs in a fresh interpreter, timed from process start.
+
+    python bench/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+snippets = [
+    ('json.load wiktionary.json', "import json; json.load(open('wiktionary.json'))"),
+    ('packed wiktionary lookup', "from wiktionary import wiktionary; wiktionary.ipa(u'Haus')"),
+    ('import dictionaries', "import dictionaries"),
+    ('import split', "import split"),
+    ('import text', "import text"),
+    ('import text + Text(Haus)', "import text; text.Text(u'Haus')"),
+]
+
+
+def cold_start(code, runs):
+    """
+    Returns the best wall time in seconds over runs fresh interpreters executing code.
+    """
+    best = None
+    for i in range(runs):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', code], cwd=root)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = cold_start('pass', runs)
+    print '%-28s %8.1f ms' % ('interpreter', baseline * 1000)
+    for name, code in snippets:
+        print '%-28s %8.1f ms' % (name, (cold_start(code, runs) - baseline) * 1000)
@@ -0,0 +1,54 @@
+"""
+Measures repeated short runs over the same compound-heavy vocabulary without the persistent word store,
+with an empty store (first run) and with the store filled by that run, as separate batch.py --words processes.
+The outputs of all runs must be identical.
+
+    python bench/bench_store.py [words] [workers]
+"""
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+sys.path.insert(0, here)
+
+from corpora import long_compounds
+
+
+def run(paths, workers, cache=None):
+    """
+    Runs batch.py --words over paths in a fresh process.
+    Returns (seconds, output).
+    """
+    command = [sys.executable, os.path.join(root, 'batch.py'), '--words', '--stdout', '-j', str(workers)]
+    if cache is not None:
+        command += ['--cache', cache]
+    start = time.time()
+    output = subprocess.check_output(command + paths)
+    return time.time() - start, output
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'words.txt')
+        with io.open(path, 'w', encoding='utf8') as f:
+            f.write(u'\n'.join(long_compounds(count)) + u'\n')
+        cache = os.path.join(directory, 'words.db')
+
+        found = []
+        for name, store in [('no store', None), ('empty store', cache), ('filled store', cache)]:
+            seconds, output = run([path], workers, store)
+            found.append(output)
+            print '%-13s %8.2f s' % (name, seconds)
+        assert found[0] == found[1] == found[2]
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,161 @@
+"""
+Measures splitting a line-heavy document (short verse lines and subtitle-like cues) into words and
+separators, three ways:
+    per-line pattern   splitlines, then a pattern put together for each line, as Line used to
+    tokenizer.split    splitlines, then the separator pattern compiled once (what Line does now)
+    single pass        one pass over the document giving the offsets of each token (spans below), then the
+                       words and separators of each line
+and the whole Text with every word already in the word cache.
+
+    python bench/bench_tokenize.py [lines]
+"""
+import os
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tokenizer
+from corpora import poetry
+from text import Line, Text
+
+WORD = 'word'
+PUNCTUATION = 'punctuation'
+DIGITS = 'digits'
+WHITESPACE = 'whitespace'
+NEWLINE = 'newline'
+
+# every character unicode.splitlines breaks lines at ('\r\n' counts as one break)
+line_breaks = u'\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+token_pattern = re.compile(u'(\r\n|[%s])|([ \t]+)|([0-9]+)|([%s]+)|([^ \t0-9%s%s]+)' % (
+    line_breaks, re.escape(tokenizer.punctuation), re.escape(tokenizer.punctuation), line_breaks))
+
+# kind of each group of token_pattern, by group number
+kinds = (None, NEWLINE, WHITESPACE, DIGITS, PUNCTUATION, WORD)
+
+
+def spans(text, start=0, end=None):
+    """
+    Yields (kind, start, end) for each token of text[start:end], in order, where kind is
+    'word', 'punctuation', 'digits', 'whitespace' or 'newline'.
+    """
+    if end is None:
+        end = len(text)
+    for match in token_pattern.finditer(text, start, end):
+        yield kinds[match.lastindex], match.start(), match.end()
+
+
+def line_spans(text):
+    """
+    Yields (start, end, spans) for each line of text, where spans is the list of the line's token spans.
+    Lines are the same as text.splitlines() gives.
+    """
+    line_start = 0
+    each_span = []
+    for span in spans(text):
+        if span[0] == NEWLINE:
+            yield line_start, span[1], each_span
+            line_start = span[2]
+            each_span = []
+        else:
+            each_span.append(span)
+    if line_start < len(text):
+        yield line_start, len(text), each_span
+
+
+def alternate(text, each_span):
+    """
+    each_span: spans of one line of text (no newlines)
+    Returns the line as tokenizer.split gives it: words (or u'') alternating with separators.
+    """
+    tokens = []
+    word = u''
+    separator_start = None
+    separator_end = None
+    for kind, start, end in each_span:
+        if kind == WORD:
+            if separator_start is not None:
+                tokens.append(word)
+                tokens.append(text[separator_start:separator_end])
+                separator_start = None
+            word = text[start:end]
+        else:
+            if separator_start is None:
+                separator_start = start
+            separator_end = end
+    if separator_start is not None:
+        tokens.append(word)
+        tokens.append(text[separator_start:separator_end])
+        word = u''
+    tokens.append(word)
+    return tokens
+
+
+def per_line(document):
+    """
+    Splits document the way Line.create_each_word used to: splitlines, then a pattern built for each line.
+    """
+    found = []
+    for line in document.splitlines():
+        if line.isspace():
+            found.append(None)
+            continue
+        found.append(re.split("([" + string.punctuation.replace("\'", "") + "1234567890" + "|\\s]+)", line))
+    return found
+
+
+def compiled(document):
+    """
+    Splits document the way Line does now.
+    """
+    return [Line.split_line(line) for line in document.splitlines()]
+
+
+def single_pass(document):
+    """
+    Splits document with one pass of token_pattern.
+    """
+    found = []
+    for start, end, each_span in line_spans(document):
+        if document[start:end].isspace():
+            found.append(None)
+            continue
+        found.append(alternate(document, each_span))
+    return found
+
+
+def best(function, *args):
+    times = []
+    for i in range(5):
+        start = time.time()
+        function(*args)
+        times.append(time.time() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    verse = [line for line in poetry() if line.strip()]
+    lines = []
+    for i in range(count):
+        # every line distinct, as in a subtitle file: a cue number, a timestamp or a numbered verse
+        if i % 3 == 0:
+            lines.append(u'%d' % i)
+        elif i % 3 == 1:
+            lines.append(u'00:%02d:%02d,%03d --> 00:%02d:%02d,%03d' % (i // 3600 % 60, i // 60 % 60, i % 1000,
+                                                                    i // 3600 % 60, i // 60 % 60, (i + 500) % 1000))
+        else:
+            lines.append(u'%s (%d)' % (verse[i % len(verse)], i))
+    document = u'\n'.join(lines)
+    assert per_line(document) == compiled(document) == single_pass(document)
+
+    Text(document)  # fills the word cache
+    print '%d lines, %d characters' % (len(lines), len(document))
+    print 'per-line pattern   %8.1f ms' % (best(per_line, document) * 1000)
+    print 'tokenizer.split    %8.1f ms' % (best(compiled, document) * 1000)
+    print 'single pass        %8.1f ms' % (best(single_pass, document) * 1000)
+    print 'Text, warm cache   %8.1f ms' % (best(Text, document) * 1000)
@@ -0,0 +1,68 @@
+"""
+Measures the first traffic after startup with cold caches and after a warmup.
+
+Traffic is drawn from a Zipf distribution over a vocabulary of compounds and wordlist words. A frequency
+list is counted (as warmup.py count would) from an earlier sample of the same traffic; the next sample is
+then transcribed word by word, as a fresh process would, cold and after warming the top words of the list.
+
+    python bench/bench_warmup.py [tokens] [top]
+"""
+import bisect
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import warmup
+from corpora import long_compounds, wordlist
+from text import word_cache, word_ipa
+
+
+def traffic(vocabulary, count, seed):
+    """
+    Returns count words of vocabulary, the word of rank r drawn with weight 1 / r.
+    """
+    rand = random.Random(seed)
+    cumulative = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+    return [vocabulary[bisect.bisect(cumulative, rand.random() * total)] for i in range(count)]
+
+
+def first_traffic(tokens):
+    """
+    Transcribes tokens one by one. Returns (seconds, word_cache hit ratio).
+    """
+    hits, misses = word_cache.hits, word_cache.misses
+    start = time.time()
+    for token in tokens:
+        word_ipa(token, u'')
+    seconds = time.time() - start
+    hits, misses = word_cache.hits - hits, word_cache.misses - misses
+    return seconds, float(hits) / (hits + misses)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    vocabulary = long_compounds(10000) + wordlist()[::10]
+    random.Random(0).shuffle(vocabulary)
+
+    counts = warmup.count_words(traffic(vocabulary, count * 5, seed=1))
+    frequencies = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    tokens = traffic(vocabulary, count, seed=2)
+
+    word_cache.clear()
+    seconds, ratio = first_traffic(tokens)
+    print 'cold      %8.2f s for %d words, %5.1f%% cache hits' % (seconds, count, 100 * ratio)
+
+    word_cache.clear()
+    report = warmup.warm(frequencies, top)
+    print report
+    seconds, ratio = first_traffic(tokens)
+    print 'warmed    %8.2f s for %d words, %5.1f%% cache hits' % (seconds, count, 100 * ratio)
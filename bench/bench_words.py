@@ -0,0 +1,45 @@
+"""
+Measures Word construction: words/sec, and memory held per Word (RSS growth while keeping every Word alive).
+
+    python bench/bench_words.py [words]
+"""
+import gc
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import wordlist_path
+from text import Word
+
+
+def rss():
+    """
+    Returns the resident set size of this process in bytes.
+    """
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    with open(wordlist_path) as f:
+        strings = [line.rstrip().decode('utf8') for line in f if not line.startswith('#')][:count]
+
+    gc.collect()
+    before = rss()
+    start = time.time()
+    words = []
+    for string in strings:
+        try:
+            words.append(Word(string))
+        except IndexError:
+            pass
+    elapsed = time.time() - start
+    gc.collect()
+    held = rss() - before
+
+    print '%d words' % len(words)
+    print 'Word(): %8.0f words/sec  %6.0f bytes/word held' % (len(words) / elapsed, float(held) / len(words))
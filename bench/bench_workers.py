@@ -0,0 +1,94 @@
+"""
+Measures memory per worker process with the Lexicon held as a dict (copied into every worker as
+refcounts are touched) and as the memory-mapped lexicon.pack (one copy shared by all).
+
+Each worker is forked after the Lexicon and Wiktionary table are loaded, splits and transcribes
+its share of a compound corpus, then reports its memory while every worker is still alive:
+    rss     resident pages, counting shared pages in full
+    pss     resident pages, counting shared pages divided among the processes sharing them
+    private pages only this process has (the cost of one more worker)
+
+    python bench/bench_workers.py [words per worker]
+"""
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexicon
+import split
+from text import Word, word_cache
+from wiktionary import wiktionary
+from bench_split import long_compounds
+
+
+def memory():
+    """
+    Returns (rss, pss, private) of this process in kB, from /proc/self/smaps_rollup.
+    """
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def worker(words, ready, measure, results, done):
+    word_cache.resize(0)
+    for word in words:
+        split.split_word(word)
+        try:
+            Word(word, lookup=False)
+        except IndexError:
+            pass
+    ready.put(None)
+    measure.wait()
+    results.put(memory())
+    done.wait()
+
+
+def run(workers, corpus, per_worker):
+    """
+    Forks workers processes, each transcribing per_worker words of corpus.
+    Returns the list of their (rss, pss, private) once all have finished their work.
+    """
+    ready = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    measure = multiprocessing.Event()
+    done = multiprocessing.Event()
+    processes = []
+    for i in range(workers):
+        words = [corpus[(i * per_worker + j) % len(corpus)] for j in range(per_worker)]
+        process = multiprocessing.Process(target=worker, args=(words, ready, measure, results, done))
+        process.start()
+        processes.append(process)
+    for process in processes:
+        ready.get()
+    measure.set()
+    found = [results.get() for process in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return found
+
+
+if __name__ == "__main__":
+    per_worker = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = long_compounds(20000)
+    wiktionary.open()
+    packed = split.language
+
+    # the packed run goes first, so its workers don't inherit the dict built for the second
+    backends = [('packed', lambda: packed), ('dict', lexicon.Lexicon.from_file)]
+    print '%-7s %7s %10s %10s %10s %12s' % ('lexicon', 'workers', 'rss kB', 'pss kB', 'private kB', 'total pss MB')
+    for name, load in backends:
+        split.language = load()
+        for workers in (1, 4, 16):
+            found = run(workers, corpus, per_worker)
+            rss = sum(m[0] for m in found) / len(found)
+            pss = sum(m[1] for m in found) / len(found)
+            private = sum(m[2] for m in found) / len(found)
+            print '%-7s %7d %10d %10d %10d %12.1f' % (name, workers, rss, pss, private, sum(m[1] for m in found) / 1024.0)
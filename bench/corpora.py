@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed corpora for the benchmark suite. Generated corpora use a fixed seed, so they only change
+when wordlist.txt does.
+
+Word corpora are lists of unicode words; line corpora are lists of unicode lines.
+"""
+import io
+import os
+import random
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from lexicon import wordlist_path
+
+poetry_path = os.path.join(here, "corpora", "poetry.txt")
+
+
+def wordlist():
+    """
+    Returns every word of wordlist.txt, in file order.
+    """
+    with open(wordlist_path) as f:
+        words = [line.rstrip().decode('utf8') for line in f if not line.startswith('#')]
+    return [word for word in words if word != '']
+
+
+def short_words():
+    """
+    Returns every word of wordlist.txt of at most five letters: no splitting, few Frags.
+    """
+    return [word for word in wordlist() if len(word) <= 5]
+
+
+def long_compounds(count=5000):
+    """
+    Returns the fixed compounds of bench_split.py plus generated ones, count in all.
+    """
+    from bench_split import long_compounds
+    return long_compounds(count)
+
+
+def poetry():
+    """
+    Returns the lines of corpora/poetry.txt (Rueckert's "Du bist die Ruh", as in the README, and Goethe).
+    """
+    with io.open(poetry_path, encoding='utf8') as f:
+        return f.read().splitlines()
+
+
+def prose(lines=3000, seed=0):
+    """
+    Returns lines of generated prose: sentences of wordlist words with punctuation and paragraph breaks,
+    some lines several sentences long.
+    """
+    rand = random.Random(seed)
+    words = wordlist()
+    text = []
+    for i in range(lines):
+        if rand.random() < 0.1:
+            text.append(u'')
+            continue
+        sentences = []
+        for j in range(rand.choice([1, 1, 2, 4])):
+            sentence = [rand.choice(words) for k in range(rand.randint(4, 16))]
+            sentence[0] = sentence[0].capitalize()
+            if len(sentence) > 8:
+                sentence[len(sentence) // 2] += u','
+            sentences.append(u' '.join(sentence) + rand.choice([u'.', u'.', u'!', u'?']))
+        text.append(u' '.join(sentences))
+    return text
+
+
+# name -> (kind, function), in the order the suite runs them
+corpora = [
+    ('short', ('words', short_words)),
+    ('compounds', ('words', long_compounds)),
+    ('poetry', ('lines', poetry)),
+    ('prose', ('lines', prose)),
+    ('wordlist', ('words', wordlist)),
+]
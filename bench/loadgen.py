@@ -0,0 +1,96 @@
+"""
+Load generator for server.py: concurrent clients posting random sentences to /transcribe.
+
+    python bench/loadgen.py [--url URL] [-c CLIENTS] [-n REQUESTS] [--words N] [--aligned]
+
+Prints throughput, latency percentiles and error counts, then the server's /stats.
+Start the server first, e.g. python server.py -j 4
+"""
+import argparse
+import httplib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import wordlist_path
+
+
+def make_sentences(count, words_per_sentence, seed=0):
+    """
+    Returns count utf-8 sentences of words drawn from the first 20000 words of the word list.
+    """
+    with open(wordlist_path) as f:
+        words = [line.strip() for line in f if not line.startswith('#')][:20000]
+    rand = random.Random(seed)
+    return [' '.join(rand.choice(words) for j in range(words_per_sentence)) + '.' for i in range(count)]
+
+
+def client(url, bodies, latencies, errors, lock):
+    """
+    Posts each of bodies over one keep-alive connection, recording latencies and error statuses.
+    """
+    connection = httplib.HTTPConnection(url.hostname, url.port or 80)
+    path = url.path + ('?' + url.query if url.query else '')
+    for body in bodies:
+        start = time.time()
+        try:
+            connection.request('POST', path, body, {'Content-Type': 'text/plain; charset=utf-8'})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (httplib.HTTPException, IOError):
+            connection.close()
+            connection = httplib.HTTPConnection(url.hostname, url.port or 80)
+            status = 'connection'
+        elapsed = time.time() - start
+        with lock:
+            latencies.append(elapsed)
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+    connection.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the transcription server.")
+    parser.add_argument('--url', default='http://127.0.0.1:8080/transcribe')
+    parser.add_argument('-c', '--clients', type=int, default=16, help="concurrent connections")
+    parser.add_argument('-n', '--requests', type=int, default=2000, help="total requests")
+    parser.add_argument('--words', type=int, default=12, help="words per request")
+    parser.add_argument('--aligned', action='store_true', help="ask for aligned output")
+    args = parser.parse_args()
+
+    url = urlparse.urlparse(args.url + ('?format=aligned' if args.aligned else ''))
+    sentences = make_sentences(args.requests, args.words)
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=client, args=(url, sentences[i::args.clients], latencies, errors, lock))
+               for i in range(args.clients)]
+
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    latencies.sort()
+    print '%d requests, %d clients, %d words each: %.2fs' % (len(latencies), args.clients, args.words, elapsed)
+    print 'throughput  %8.1f requests/sec  %8.1f words/sec' % (len(latencies) / elapsed, len(latencies) * args.words / elapsed)
+    print 'latency     p50 %.1f ms  p99 %.1f ms  max %.1f ms' % (percentile(latencies, 0.5) * 1000,
+                                                          percentile(latencies, 0.99) * 1000, latencies[-1] * 1000)
+    print 'errors      %s' % (errors or 'none')
+
+    stats = httplib.HTTPConnection(url.hostname, url.port or 80)
+    stats.request('GET', '/stats')
+    print 'server      %s' % json.dumps(json.loads(stats.getresponse().read()), sort_keys=True)
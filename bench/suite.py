@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite and regression check for the transcription pipeline.
+
+Runs every corpus of corpora.py through the pipeline, timing each stage separately:
+    startup        a fresh interpreter importing text (ms, best of 3)
+    split_word     split.split_word on each word
+    create_each_part   Word.create_each_part on each word, after splitting
+    ipa_rule       Root.ipa_rule on each Root
+    word           building a whole Word (through the precomputed ipa table, if one is compiled)
+    create_ipa     Line.create_ipa on each line of a line corpus, from precomputed ipa
+and reporting items/sec and p50/p99 latency for each, plus peak RSS.
+
+Every transcription is compared against bench/golden.tsv.gz; any difference is listed and
+the suite exits with status 1. Results are saved as json for comparing commits.
+
+    python bench/suite.py [--corpus NAME]... [--limit N] [--out FILE] [--compare FILE]
+                          [--update-golden] [--no-golden]
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import timeit
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+sys.path.insert(0, here)
+
+from corpora import corpora
+from ipa_table import ipa_table
+from part import Root
+from split import split_word
+from text import Line, Word
+
+golden_path = os.path.join(here, "golden.tsv.gz")
+results_dir = os.path.join(here, "results")
+clock = timeit.default_timer
+
+
+def summarize(latencies):
+    """
+    latencies: list of seconds, one per item
+    Returns a dict of count, total seconds, items/sec and p50/p99 latency in microseconds.
+    """
+    if not latencies:
+        return {'count': 0}
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'seconds': total,
+        'per_sec': len(latencies) / total if total else 0.0,
+        'p50_us': ordered[int(0.5 * (len(ordered) - 1))] * 1e6,
+        'p99_us': ordered[int(0.99 * (len(ordered) - 1))] * 1e6,
+    }
+
+
+def startup(runs=3):
+    """
+    Returns the best time in ms for a fresh interpreter to import text, less the bare interpreter start.
+    """
+    def best(code):
+        times = []
+        for i in range(runs):
+            start = clock()
+            subprocess.check_call([sys.executable, '-c', code], cwd=root)
+            times.append(clock() - start)
+        return min(times)
+    return (best('import text') - best('pass')) * 1000
+
+
+def transcribe_words(words, outputs):
+    """
+    Appends (word, ipa) to outputs for each word, or (word, 'ERR <exception>') if the rules fail on it.
+    Returns the list of Words that were transcribed.
+    """
+    built = []
+    for word in words:
+        try:
+            entry = Word(word, lookup=False)
+        except Exception as error:
+            outputs.append((word, u'ERR ' + type(error).__name__))
+            continue
+        outputs.append((word, entry.ipa))
+        built.append(entry)
+    return built
+
+
+def time_words(words, outputs):
+    """
+    Times each word stage over words, recording their transcriptions in outputs.
+    Returns a dict of stage -> summary.
+    """
+    built = transcribe_words(words, outputs)
+    strings = [entry.fullword for entry in built]
+
+    latencies = []
+    for string in strings:
+        start = clock()
+        split_word(string)
+        latencies.append(clock() - start)
+    stages = {'split_word': summarize(latencies)}
+
+    latencies = []
+    for entry in built:
+        entry.finalstress = False
+        start = clock()
+        entry.create_each_part()
+        latencies.append(clock() - start)
+    stages['create_each_part'] = summarize(latencies)
+
+    latencies = []
+    for entry in built:
+        ipa = []
+        for i in range(entry.length):
+            part = entry.each_part[i]
+            if isinstance(part, Root):
+                start = clock()
+                partipa = part.ipa_rule(entry.finalstress, ipa, entry.each_part, entry.length, i)
+                latencies.append(clock() - start)
+            else:
+                partipa = part.ipa_rule(entry.finalstress, ipa, entry.each_part, entry.length, i)
+            ipa.append(partipa)
+    stages['ipa_rule'] = summarize(latencies)
+
+    latencies = []
+    for string in strings:
+        start = clock()
+        Word(string)
+        latencies.append(clock() - start)
+    stages['word'] = summarize(latencies)
+    return stages
+
+
+def time_lines(lines, outputs):
+    """
+    Times transcription of the words of lines and alignment of each line, recording each line's
+    aligned text and ipa in outputs. Returns a dict of stage -> summary.
+    """
+    words = []
+    for line in lines:
+        each_token = Line.split_line(line)
+        if each_token is not None:
+            words.extend(token for token in each_token[::2] if token != '')
+    word_outputs = []
+    stages = time_words(sorted(set(words)), word_outputs)
+    ipas = dict(word_outputs)
+
+    latencies = []
+    for line in lines:
+        each_token = Line.split_line(line)
+        if each_token is not None and any(ipas.get(token, u'').startswith(u'ERR ') for token in each_token[::2]):
+            outputs.append((line, u'ERR'))
+            continue
+        aligned = Line(line, ipas)
+        start = clock()
+        aligned.create_ipa(aligned.each_word, ipas)
+        latencies.append(clock() - start)
+        outputs.append((line, aligned.adjustedline + u'|' + aligned.ipa))
+    stages['create_ipa'] = summarize(latencies)
+    return stages
+
+
+def read_golden(path=golden_path):
+    """
+    Returns a dict of corpus -> list of (input, output), or {} if there is no golden file.
+    """
+    golden = {}
+    if not os.path.exists(path):
+        return golden
+    with gzip.open(path) as f:
+        for line in f:
+            corpus, item, output = line.decode('utf8').rstrip(u'\n').split(u'\t', 2)
+            golden.setdefault(corpus, []).append((item, output))
+    return golden
+
+
+def write_golden(outputs, path=golden_path):
+    """
+    outputs: dict of corpus -> list of (input, output)
+    """
+    # a fixed mtime keeps the file identical when the outputs are
+    with open(path, 'wb') as raw, gzip.GzipFile('', 'wb', 9, raw, mtime=0) as f:
+        for corpus in sorted(outputs):
+            for item, output in outputs[corpus]:
+                f.write((u'%s\t%s\t%s\n' % (corpus, item, output)).encode('utf8'))
+
+
+def compare_golden(golden, outputs, shown=10):
+    """
+    Prints the differences between outputs and golden for every corpus in outputs.
+    Returns the number of differences.
+    """
+    differences = 0
+    for corpus in sorted(outputs):
+        expected = golden.get(corpus)
+        if expected is None:
+            print 'golden: no entries for %s' % corpus
+            differences += 1
+            continue
+        found = outputs[corpus]
+        if len(expected) < len(found):
+            differences += len(found) - len(expected)
+            print 'golden: %s has %d more items than the golden file' % (corpus, len(found) - len(expected))
+        for (item, output), (expected_item, expected_output) in zip(found, expected):
+            if (item, output) != (expected_item, expected_output):
+                differences += 1
+                if differences <= shown:
+                    print (u'golden: %s: %s\n    expected %s\n    found    %s' % (
+                        corpus, item, expected_output, output)).encode('utf8')
+    return differences
+
+
+def git_commit():
+    """
+    Returns the current commit hash, or None outside a git checkout.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """
+    Prints a table of every corpus and stage, with the speedup over baseline if given.
+    """
+    print '%-10s %-17s %8s %12s %10s %10s %8s' % ('corpus', 'stage', 'count', 'per sec', 'p50 us', 'p99 us',
+                                                 'speedup' if baseline else '')
+    for corpus, stages in results['corpora']:
+        old_stages = dict(dict(baseline['corpora']).get(corpus, {})) if baseline else {}
+        for stage in sorted(stages):
+            summary = stages[stage]
+            if not summary['count']:
+                continue
+            speedup = ''
+            old = old_stages.get(stage)
+            if old and old.get('per_sec'):
+                speedup = '%.2fx' % (summary['per_sec'] / old['per_sec'])
+            print '%-10s %-17s %8d %12.0f %10.1f %10.1f %8s' % (
+                corpus, stage, summary['count'], summary['per_sec'], summary['p50_us'], summary['p99_us'], speedup)
+    print 'startup %.1f ms, peak RSS %.1f MB' % (results['startup_ms'], results['peak_rss_kb'] / 1024.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on fixed corpora and check the output.")
+    parser.add_argument('--corpus', action='append', choices=[name for name, corpus in corpora],
+                        help="corpus to run (repeatable; default: all)")
+    parser.add_argument('--limit', type=int, default=None, help="use only the first N items of each corpus")
+    parser.add_argument('--out', default=None, help="json results file (default: bench/results/COMMIT.json)")
+    parser.add_argument('--compare', default=None, help="json results file to compare against")
+    parser.add_argument('--update-golden', action='store_true', help="rewrite the golden file from this run")
+    parser.add_argument('--no-golden', action='store_true', help="skip the golden check")
+    args = parser.parse_args()
+
+    chosen = args.corpus or [name for name, corpus in corpora]
+    if args.limit is not None and args.update_golden:
+        parser.error("--update-golden needs the full corpora")
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'ipa_table': bool(ipa_table.open()),
+        'startup_ms': startup(),
+        'corpora': [],
+    }
+    outputs = {}
+    for name, (kind, function) in corpora:
+        if name not in chosen:
+            continue
+        items = function()[:args.limit]
+        outputs[name] = []
+        if kind == 'words':
+            stages = time_words(items, outputs[name])
+        else:
+            stages = time_lines(items, outputs[name])
+        results['corpora'].append((name, stages))
+    results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    status = 0
+    if args.update_golden:
+        golden = read_golden()
+        golden.update(outputs)
+        write_golden(golden)
+        results['golden'] = 'updated'
+        print 'golden: wrote %s' % golden_path
+    elif not args.no_golden:
+        differences = compare_golden(read_golden(), outputs)
+        results['golden'] = 'same' if differences == 0 else '%d differences' % differences
+        print 'golden: %s' % results['golden']
+        if differences:
+            status = 1
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    out = args.out
+    if out is None:
+        if not os.path.isdir(results_dir):
+            os.makedirs(results_dir)
+        out = os.path.join(results_dir, '%s.json' % (results['commit'] or 'results'))
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print 'results: %s' % out
+    sys.exit(status)
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Represents a bounded mapping that evicts the least recently used entry when full.
+    Keeps hit, miss and eviction counters.
+    """
+    def __init__(self, maxsize=10000):
+        """
+        maxsize: maximum number of entries held. 0 disables caching.
+        self.entries: OrderedDict of entries, least recently used first
+        self.hits, self.misses, self.evictions: counters since creation or the last clear()
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """
+        Returns the entry for key and marks it as most recently used, or default if missing.
+        """
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Adds or replaces the entry for key, evicting the least recently used entries if full.
+        """
+        if self.maxsize <= 0:
+            return
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize):
+        """
+        Changes maxsize, evicting entries if the cache is now too full.
+        """
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Returns a dict of counters, size and hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hit_ratio': float(self.hits) / lookups if lookups else 0.0
+        }
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import snapshot
 
 vowels = ('a', 'e', 'i', 'o', 'u', 'y', 'ä', 'ë', 'ï', 'ö', 'ü')
 consonant = ['b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'q', 'r', 's', 't', 'v', 'w', 'x', 'z', 'ß']
@@ -227,13 +228,22 @@ ipa_easy_clusters = {
     "dn" : "dn"
 }
 
-prefixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_prefixes.items()}
-insep_prefixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_insep_prefixes.items()}
-suffixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_suffixes.items()}
-stressed_suffixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_stressed_suffixes.items()}
-endings = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_endings.items()}
-closed_vowels = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_closed_vowels.items()}
-open_vowels = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_open_vowels.items()}
-normal_consonants = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_normal_consonants.items()}
-diphthongs = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_diphthongs.items()}
-easy_clusters = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_easy_clusters.items()}
+# use the decoded tables from the prepared snapshot if it is fresh
+tables = snapshot.load()
+if tables is not None:
+    globals().update(tables['lists'])
+    globals().update((name, dict(items)) for name, items in tables['dicts'].items())
+else:
+    prefixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_prefixes.items()}
+    insep_prefixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_insep_prefixes.items()}
+    suffixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_suffixes.items()}
+    stressed_suffixes = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_stressed_suffixes.items()}
+    endings = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_endings.items()}
+    closed_vowels = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_closed_vowels.items()}
+    open_vowels = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_open_vowels.items()}
+    normal_consonants = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_normal_consonants.items()}
+    diphthongs = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_diphthongs.items()}
+    easy_clusters = {k.decode('utf8'): v.decode('utf8') for k, v in ipa_easy_clusters.items()}
+
+    # write a fresh snapshot of the decoded tables for the next start
+    snapshot.save()
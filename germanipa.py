@@ -1,11 +1,38 @@
-from text import Text
+import sys
+from text import Text, record_formats, transcribe_stream
+from word_store import word_store
 
 if __name__ == "__main__":
+    # wrap long lines into aligned blocks: --width N
+    width = None
+    if '--width' in sys.argv[1:]:
+        width = int(sys.argv[sys.argv.index('--width') + 1])
+
+    # a record per word instead of aligned lines: --format jsonl or --format tsv
+    output_format = None
+    if '--format' in sys.argv[1:]:
+        output_format = (sys.argv[sys.argv.index('--format') + 1:] or [None])[0]
+        if output_format not in record_formats:
+            sys.exit('usage: --format %s' % '|'.join(record_formats))
+
+    # keep the words the rules transcribe for later runs: --cache FILE
+    if '--cache' in sys.argv[1:]:
+        word_store.enable(sys.argv[sys.argv.index('--cache') + 1])
+
+    # stream mode: transcribe stdin to stdout line by line
+    if '--stream' in sys.argv[1:]:
+        transcribe_stream(sys.stdin, sys.stdout, '--dict' in sys.argv[1:], width, output_format)
+        sys.exit()
+
     while True:
         sentinel = '/' # ends when this string is seen
         print 'Enter a German text below.\nThen type "/" and hit enter.\n'
         a = '\n'.join(iter(raw_input, sentinel))
         if a == "":
             break
-        b = Text(a.decode('utf8'))
-        b.print_ipa()
\ No newline at end of file
+        if output_format is None:
+            b = Text(a.decode('utf8'))
+            b.print_ipa(width)
+        else:
+            b = Text(a.decode('utf8'), align=False)
+            b.print_records(output_format)
@@ -0,0 +1,212 @@
+"""
+Optional per-stage timing of the transcription pipeline.
+
+While enabled, the pipeline's stage functions are wrapped so that each call is counted and timed:
+    split_word                      splitting into simple words
+    create_each_part                prefix and suffix stripping
+    create_ipa                      a whole Word's ipa, including the stages below
+    wiktionary hit / miss           Wiktionary lookups
+    ipa_table hit / miss            precomputed table lookups
+    shared_cache hit / miss         lookups in the cache shared by worker processes
+    word_store hit / miss           persistent store lookups
+    split fallbacks                 words left unsplit because they ran over split.py's work budget
+    ipa_rule Pref / Suff / Root     each Part's ipa rule
+    frag_ipa Cons / Clust / ...     each Frag's rule
+    alignment                       Line.create_ipa
+Times are inclusive (create_ipa includes the ipa_rule and frag_ipa calls it makes).
+When disabled nothing is wrapped, so it costs nothing.
+
+    with instrument.profiling():
+        Text(string)
+    print instrument.stats.report()
+"""
+import cProfile
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import ipa_table
+import part
+import rules
+import shared_cache
+import split
+import text
+import wiktionary
+import word_store
+
+
+class Stats(object):
+    """
+    Represents the counters: calls and seconds per stage, and hits and misses per lookup.
+    """
+    def __init__(self):
+        """
+        self.stages: dict of stage name -> [calls, seconds]
+        self.lookups: dict of lookup name -> [hits, misses]
+        self.cache_start: (hits, misses) of text.word_cache when the counters were last reset
+        self.fallbacks_start: split.fallbacks when the counters were last reset
+        """
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.lookups = {}
+        self.cache_start = (text.word_cache.hits, text.word_cache.misses)
+        self.fallbacks_start = split.fallbacks
+
+    def add(self, stage, seconds):
+        found = self.stages.get(stage)
+        if found is None:
+            self.stages[stage] = [1, seconds]
+        else:
+            found[0] += 1
+            found[1] += seconds
+
+    def lookup(self, name, hit):
+        found = self.lookups.setdefault(name, [0, 0])
+        found[0 if hit else 1] += 1
+
+    def report(self):
+        """
+        Returns the counters as a table, slowest stage first, followed by hit ratios.
+        """
+        lines = ['%-22s %10s %12s %10s' % ('stage', 'calls', 'total ms', 'us/call')]
+        for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append('%-22s %10d %12.2f %10.2f' % (stage, calls, seconds * 1000, seconds / calls * 1e6))
+        lookups = dict(self.lookups)
+        lookups['word_cache'] = [text.word_cache.hits - self.cache_start[0], text.word_cache.misses - self.cache_start[1]]
+        for name in sorted(lookups):
+            hits, misses = lookups[name]
+            if hits + misses:
+                lines.append('%-22s %10d hits %8d misses %6.1f%% hit ratio' % (
+                    name, hits, misses, 100.0 * hits / (hits + misses)))
+        lines.append('%-22s %10d' % ('split fallbacks', split.fallbacks - self.fallbacks_start))
+        return '\n'.join(lines)
+
+
+stats = Stats()
+
+# number of nested enable() calls still active
+depth = 0
+
+# (owner, attribute, original) of every wrapped function, for disable()
+installed = []
+
+
+def timed(stage, function):
+    """
+    Returns function wrapped to add each call's time to stage.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.add(stage, time.time() - start)
+    return wrapper
+
+
+def timed_frag(function):
+    """
+    Returns rules.frag_ipa wrapped to time each call under the kind of the Frag.
+    """
+    @wraps(function)
+    def wrapper(each_frag, rootindex, *args, **kwargs):
+        start = time.time()
+        try:
+            return function(each_frag, rootindex, *args, **kwargs)
+        finally:
+            stats.add('frag_ipa ' + type(each_frag[rootindex]).__name__, time.time() - start)
+    return wrapper
+
+
+def counted(name, function):
+    """
+    Returns a lookup function wrapped to count a hit when it returns something other than None.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        try:
+            found = function(*args, **kwargs)
+        finally:
+            stats.add(name, time.time() - start)
+        stats.lookup(name, found is not None)
+        return found
+    return wrapper
+
+
+def hooks():
+    """
+    Returns (owner, attribute, wrap) for every stage, where wrap takes the original function.
+    """
+    found = [
+        (text, 'split_word', lambda function: timed('split_word', function)),
+        (text.Word, 'create_each_part', lambda function: timed('create_each_part', function)),
+        (text.Word, 'create_ipa', lambda function: timed('create_ipa', function)),
+        (text.Line, 'create_ipa', lambda function: timed('alignment', function)),
+        (wiktionary.WiktionaryStore, 'ipa', lambda function: counted('wiktionary', function)),
+        (ipa_table.IpaTable, 'get', lambda function: counted('ipa_table', function)),
+        (shared_cache.SharedCache, 'get', lambda function: counted('shared_cache', function)),
+        (word_store.WordStore, 'get', lambda function: counted('word_store', function)),
+        (rules, 'frag_ipa', timed_frag),
+    ]
+    for cls in (part.Pref, part.Suff, part.Root):
+        found.append((cls, 'ipa_rule', lambda function, cls=cls: timed('ipa_rule ' + cls.__name__, function)))
+    return found
+
+
+def enable():
+    """
+    Wraps every stage, if not already wrapped. Calls nest: each enable() needs its own disable().
+    """
+    global depth
+    depth += 1
+    if depth > 1:
+        return
+    for owner, attribute, wrap in hooks():
+        original = owner.__dict__[attribute]
+        installed.append((owner, attribute, original))
+        setattr(owner, attribute, wrap(original))
+
+
+def disable():
+    """
+    Restores the original stages once every enable() has been matched.
+    """
+    global depth
+    if depth == 0:
+        return
+    depth -= 1
+    if depth > 0:
+        return
+    while installed:
+        owner, attribute, original = installed.pop()
+        setattr(owner, attribute, original)
+
+
+@contextmanager
+def profiling(reset=True):
+    """
+    Enables the instrumentation for the duration of a with block, resetting the counters first.
+    """
+    if reset:
+        stats.reset()
+    enable()
+    try:
+        yield stats
+    finally:
+        disable()
+
+
+def run_cprofile(function, path, *args, **kwargs):
+    """
+    Runs function under cProfile, writing the pstats file to path.
+    Returns the result of function.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
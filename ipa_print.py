@@ -1,7 +1,43 @@
 import sys
-from text import Text
+from text import Text, record_formats
+from word_store import word_store
 
 if __name__ == "__main__":
-    a = sys.argv[1]
-    b = Text(a.decode('utf8'))
-    b.print_dict_ipa()
+    # --profile prints the time spent in each stage to stderr; --pstats FILE also writes a cProfile stats file
+    args = sys.argv[1:]
+    pstats_path = None
+    if '--pstats' in args:
+        pstats_path = args.pop(args.index('--pstats') + 1)
+        args.remove('--pstats')
+    profile = '--profile' in args
+    if profile:
+        args.remove('--profile')
+
+    # --format jsonl or --format tsv prints a record per word (offsets, ipa, its source and parts) instead
+    output_format = None
+    if '--format' in args:
+        output_format = (args[args.index('--format') + 1:] or [None])[0]
+        if output_format not in record_formats:
+            sys.exit('usage: --format %s' % '|'.join(record_formats))
+        args.pop(args.index('--format') + 1)
+        args.remove('--format')
+    align = output_format is None
+
+    # --cache FILE keeps the words the rules transcribe in FILE, for later runs
+    if '--cache' in args:
+        word_store.enable(args.pop(args.index('--cache') + 1))
+        args.remove('--cache')
+
+    a = args[0]
+    if pstats_path is not None:
+        import instrument
+        b = instrument.run_cprofile(Text, pstats_path, a.decode('utf8'), profile, align)
+    else:
+        b = Text(a.decode('utf8'), profile, align)
+    if align:
+        b.print_dict_ipa()
+    else:
+        b.print_records(output_format)
+    if profile:
+        import instrument
+        sys.stderr.write(instrument.stats.report() + '\n')
@@ -0,0 +1,160 @@
+"""
+Precomputed IPA for every word in wordlist.txt and every Wiktionary key, compiled into a packed table (see packed.py).
+
+Each record maps a surface form to its ipa, its split into simple words, whether it has a stressed suffix,
+where its ipa came from (Wiktionary or the rules) and its Parts,
+so a Word found in the table skips splitting and the Frag rules entirely.
+The table holds a version record (under the empty key) with a hash of the sources that produced it;
+it is only used while that hash matches the current sources, and only with the default scoring rule.
+
+    python ipa_table.py    compiles ipa.pack (takes a few seconds)
+"""
+import hashlib
+import os
+
+from packed import PackedTable, write_table
+import split
+
+here = os.path.dirname(os.path.abspath(__file__))
+table_path = os.path.join(here, "ipa.pack")
+
+# every file whose contents can change a Word's ipa or split, or the layout of the table
+sources = [os.path.join(here, name) for name in
+           ["wordlist.txt", "wiktionary.json", "wiktionary.py", "dictionaries.py", "lexicon.py", "split.py",
+            "affix.py", "part.py", "rules.py", "text.py", "packed.py"]]
+
+# key of the version record; no word is empty
+version_key = u''
+
+# the scoring rule the table is compiled with
+scoring = 'first'
+
+
+def source_hash():
+    """
+    Returns a hex digest of the contents of every source file.
+    """
+    digest = hashlib.md5()
+    for path in sources:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def storable(word):
+    """
+    Returns True if word can be a key of the table (no '|', tab or NUL in it).
+    """
+    return not any(char in word for char in u'|\t\0')
+
+
+def pack_entry(entry):
+    """
+    entry: a Word
+    Returns the record string stored for entry.
+    """
+    parts = u'|'.join(kind + u':' + string for kind, string in entry.parts)
+    return u'%s\t%s\t%d\t%s\t%s' % (entry.ipa, u'|'.join(entry.each_simple), entry.finalstress, entry.source, parts)
+
+
+def unpack_entry(record):
+    """
+    Returns (ipa, list of simple words, finalstress, source, parts) from a record string made by pack_entry,
+    where parts is a tuple of (kind, string) for each Part.
+    """
+    ipa, simple, finalstress, source, parts = record.split(u'\t')
+    parts = tuple(tuple(part.split(u':', 1)) for part in parts.split(u'|')) if parts else ()
+    return ipa, simple.split(u'|'), finalstress == u'1', str(source), parts
+
+
+def table_words():
+    """
+    Yields every word of wordlist.txt and every Wiktionary key.
+    """
+    from wiktionary import wiktionary
+    with open(sources[0]) as f:
+        for line in f:
+            if not line.startswith('#'):
+                yield line.rstrip().decode('utf8')
+    for word, value in wiktionary.open().items():
+        yield word
+
+
+def build(target=table_path):
+    """
+    Runs every table word through the rule pipeline and writes the results to a packed table.
+    Words that can't be stored ('|', tab or NUL in them) or can't be transcribed are left out,
+    so they still go through the rules at lookup time.
+    Returns the number of words written.
+    """
+    from text import Word
+    previous, split.scoring = split.scoring, scoring
+    try:
+        records = {version_key: unicode(source_hash())}
+        for word in table_words():
+            if word in records or not storable(word):
+                continue
+            try:
+                entry = Word(word, lookup=False)
+            except IndexError:
+                continue
+            records[word] = pack_entry(entry)
+    finally:
+        split.scoring = previous
+    write_table(target, records.items())
+    return len(records) - 1
+
+
+class IpaTable(object):
+    """
+    Represents the precomputed table. Nothing is read until the first lookup.
+    The table is never built at lookup time: if it is missing or stale, every lookup misses.
+    """
+    def __init__(self, target=table_path):
+        """
+        self.target: path of the packed table
+        self.table: PackedTable, False if it is missing or stale, None until first use
+        """
+        self.target = target
+        self.table = None
+
+    def open(self):
+        """
+        Opens the packed table if it exists and was compiled from the current sources.
+        Returns the PackedTable, or False.
+        """
+        if self.table is None:
+            self.table = False
+            try:
+                table = PackedTable(self.target)
+            except (IOError, OSError, ValueError):
+                return self.table
+            if table.get(version_key) == source_hash():
+                self.table = table
+            else:
+                table.close()
+        return self.table
+
+    def get(self, word):
+        """
+        Returns (ipa, list of simple words, finalstress, source, parts) for word (see unpack_entry),
+        or None if it is not in the table.
+        """
+        if split.scoring != scoring:
+            return None
+        table = self.table
+        if table is None:
+            table = self.open()
+        if (table is False) or (word == version_key):
+            return None
+        found = table.get(word)
+        if found is None:
+            return None
+        return unpack_entry(found)
+
+
+ipa_table = IpaTable()
+
+if __name__ == "__main__":
+    count = build()
+    print 'wrote %d words to %s' % (count, table_path)
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+The Lexicon of simple words used to split compounds, held either as a dict (Lexicon) or as a
+hash table memory-mapped from lexicon.pack (PackedLexicon), which every process shares.
+
+lexicon.pack layout (all integers little-endian uint32):
+    header: magic 'GIPL', format version, number of slots (a power of two), number of words
+    slots: one (key offset, key length * 2 + is_word) pair per slot, length 0xffffffff if empty
+    keys: the utf-8 bytes of every trie node, concatenated
+A node is found by probing slots linearly from the crc32 of its utf-8 bytes.
+
+    python lexicon.py    rebuilds lexicon.pack from wordlist.txt
+"""
+import mmap
+import os
+import struct
+import zlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+wordlist_path = os.path.join(here, "wordlist.txt")
+pack_path = os.path.join(here, "lexicon.pack")
+
+magic = 'GIPL'
+version = 1
+header = struct.Struct('<4sIII')
+slot = struct.Struct('<II')
+empty = 0xffffffff
+
+
+class Lexicon(object):
+    """
+    Represents the list of simple German words used to split compound words.
+    Stored as a prefix trie flattened into one dict: every prefix of every word is a node,
+    mapped to True if the node is itself a word and to False otherwise.
+    """
+    def __init__(self, words=()):
+        """
+        words: an iterable of unicode strings
+        self.nodes: dict mapping each trie node (a prefix of some word) to whether it is a word
+        self.size: number of words in the Lexicon
+        """
+        self.nodes = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def from_file(cls, path=wordlist_path):
+        """
+        Reads a utf-8 word list with one word per line, skipping '#' comment lines.
+        Returns a new Lexicon.
+        """
+        with open(path) as f:
+            return cls(line.rstrip().decode('utf8') for line in f if not line.startswith('#'))
+
+    @classmethod
+    def from_nodes(cls, nodes, size):
+        """
+        Wraps an existing trie node dict (e.g. one loaded from a snapshot).
+        Returns a new Lexicon.
+        """
+        language = cls()
+        language.nodes = nodes
+        language.size = size
+        return language
+
+    def add(self, word):
+        """
+        Adds word and all of its prefixes to the trie.
+        """
+        if word == '' or self.nodes.get(word):
+            return
+        for i in range(1, len(word)):
+            self.nodes.setdefault(word[:i], False)
+        self.nodes[word] = True
+        self.size += 1
+
+    def __contains__(self, word):
+        return self.nodes.get(word, False)
+
+    def words(self):
+        """
+        Yields every word, in no particular order.
+        """
+        for node, is_word in self.nodes.items():
+            if is_word:
+                yield node
+
+    def __len__(self):
+        return self.size
+
+    def prefix_ends(self, string, start=0, stop=None):
+        """
+        Walks the trie once along string[start:stop].
+        Yields each end index i (in increasing order) such that string[start:i] is a word.
+        """
+        if stop is None:
+            stop = len(string)
+        nodes = self.nodes
+        for i in range(start + 1, stop + 1):
+            node = nodes.get(string[start:i])
+            if node is None:
+                return
+            if node:
+                yield i
+
+
+def write_packed(language, path=pack_path):
+    """
+    language: a Lexicon
+    Writes its trie nodes as a hash table to a temporary file and renames it over path.
+    """
+    nodes = [(node.encode('utf8'), is_word) for node, is_word in language.nodes.items()]
+    slots = 1
+    while slots < len(nodes) * 2:
+        slots *= 2
+    mask = slots - 1
+    table = [(0, empty)] * slots
+    keys = []
+    position = 0
+    for node, is_word in nodes:
+        i = zlib.crc32(node) & mask
+        while table[i][1] != empty:
+            i = (i + 1) & mask
+        table[i] = (position, len(node) * 2 + (1 if is_word else 0))
+        keys.append(node)
+        position += len(node)
+    temp = path + '.tmp%d' % os.getpid()
+    with open(temp, 'wb') as f:
+        f.write(header.pack(magic, version, slots, language.size))
+        f.write(''.join(slot.pack(*entry) for entry in table))
+        f.write(''.join(keys))
+    os.rename(temp, path)
+
+
+class PackedLexicon(object):
+    """
+    Represents a read-only Lexicon memory-mapped from a file written by write_packed.
+    Processes that open the same file share one physical copy of it.
+    """
+    def __init__(self, path=pack_path):
+        """
+        self.path: path of the packed file
+        self.size: number of words
+        self.mask: number of slots - 1
+        self.keys: offset of the keys in the file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tag, file_version, slots, self.size = header.unpack_from(self.buffer, 0)
+        if tag != magic or file_version != version:
+            self.buffer.close()
+            raise ValueError("%s is not a version %d packed lexicon" % (path, version))
+        self.mask = slots - 1
+        self.keys = header.size + slots * slot.size
+
+    def node(self, key):
+        """
+        key: utf-8 encoded bytes
+        Returns True if key is a word, False if it is only the start of one, None if neither.
+        """
+        mapped = self.buffer
+        unpack = slot.unpack_from
+        i = zlib.crc32(key) & self.mask
+        while True:
+            start, length = unpack(mapped, header.size + i * slot.size)
+            if length == empty:
+                return None
+            if (length >> 1) == len(key):
+                start += self.keys
+                if mapped[start:start + len(key)] == key:
+                    return (length & 1) == 1
+            i = (i + 1) & self.mask
+
+    def __contains__(self, word):
+        return self.node(word.encode('utf8')) is True
+
+    def __len__(self):
+        return self.size
+
+    def words(self):
+        """
+        Yields every word, in no particular order.
+        """
+        for i in range(self.mask + 1):
+            start, length = slot.unpack_from(self.buffer, header.size + i * slot.size)
+            if length != empty and (length & 1):
+                start += self.keys
+                yield self.buffer[start:start + (length >> 1)].decode('utf8')
+
+    def prefix_ends(self, string, start=0, stop=None):
+        """
+        Walks the trie once along string[start:stop].
+        Yields each end index i (in increasing order) such that string[start:i] is a word.
+        """
+        if stop is None:
+            stop = len(string)
+        mapped = self.buffer
+        unpack = slot.unpack_from
+        crc32 = zlib.crc32
+        mask = self.mask
+        keys = self.keys
+        first = header.size
+        width = slot.size
+        key = ''
+        for i in range(start + 1, stop + 1):
+            key += string[i - 1].encode('utf8')
+
+            # probe for key as in node(), inlined because this is the splitter's inner loop
+            size = len(key)
+            j = crc32(key) & mask
+            while True:
+                offset, length = unpack(mapped, first + j * width)
+                if length == empty:
+                    return
+                if ((length >> 1) == size) and (mapped[keys + offset:keys + offset + size] == key):
+                    break
+                j = (j + 1) & mask
+            if length & 1:
+                yield i
+
+    def close(self):
+        self.buffer.close()
+
+
+def load(path=pack_path, source=wordlist_path):
+    """
+    Returns the PackedLexicon at path, (re)building it first if it is missing or older than source.
+    If it can't be written or read, returns a Lexicon read from source instead.
+    """
+    try:
+        if (not os.path.exists(path)) or (os.path.getmtime(path) < os.path.getmtime(source)):
+            write_packed(Lexicon.from_file(source), path)
+        return PackedLexicon(path)
+    except (IOError, OSError, ValueError):
+        return Lexicon.from_file(source)
+
+
+if __name__ == "__main__":
+    write_packed(Lexicon.from_file())
+    print 'wrote %s' % pack_path
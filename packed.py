@@ -0,0 +1,128 @@
+"""
+Sorted, offset-indexed string tables stored in a single file and read through mmap.
+
+File layout (all integers little-endian uint32):
+    header: magic 'GIPK', format version, number of records n
+    offsets: n + 1 offsets of each record from the start of the data section
+    data: records sorted by utf-8 key, each one key + '\\0' + value
+Looking up a key is a binary search over the offsets and reads only the records it touches.
+"""
+import mmap
+import os
+import struct
+
+magic = 'GIPK'
+version = 1
+header = struct.Struct('<4sII')
+offset = struct.Struct('<I')
+
+
+def write_table(path, items):
+    """
+    items: iterable of (key, value) unicode string pairs. Keys must not contain '\\0'.
+    Writes the table to a temporary file first and renames it over path, so readers never see a partial table.
+    """
+    records = sorted((key.encode('utf8'), value.encode('utf8')) for key, value in items)
+    offsets = [0]
+    for key, value in records:
+        offsets.append(offsets[-1] + len(key) + 1 + len(value))
+    temp = path + '.tmp%d' % os.getpid()
+    with open(temp, 'wb') as f:
+        f.write(header.pack(magic, version, len(records)))
+        f.write(struct.pack('<%dI' % len(offsets), *offsets))
+        for key, value in records:
+            f.write(key + '\0' + value)
+    os.rename(temp, path)
+
+
+class PackedTable(object):
+    """
+    Represents a read-only table written by write_table, memory-mapped from disk.
+    """
+    def __init__(self, path):
+        """
+        self.path: path of the table file
+        self.length: number of records
+        self.data: offset of the data section in the file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tag, file_version, self.length = header.unpack_from(self.buffer, 0)
+        if tag != magic or file_version != version:
+            self.buffer.close()
+            raise ValueError("%s is not a version %d packed table" % (path, version))
+        self.data = header.size + (self.length + 1) * offset.size
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, key):
+        return self.find(key.encode('utf8')) >= 0
+
+    def record(self, i):
+        """
+        Returns the raw bytes of the i-th record.
+        """
+        start, end = struct.unpack_from('<II', self.buffer, header.size + i * offset.size)
+        return self.buffer[self.data + start:self.data + end]
+
+    def key(self, i):
+        """
+        Returns the utf-8 key of the i-th record, reading nothing else.
+        """
+        start = self.data + offset.unpack_from(self.buffer, header.size + i * offset.size)[0]
+        return self.buffer[start:self.buffer.find('\0', start)]
+
+    def bisect(self, key, low=0, high=None):
+        """
+        key: utf-8 encoded bytes
+        Returns the index of the first record in [low, high) whose key is not less than key
+        (high, or the number of records, if there is none).
+        """
+        mapped = self.buffer
+        data = self.data
+        unpack = offset.unpack_from
+        if high is None:
+            high = self.length
+        while low < high:
+            middle = (low + high) // 2
+
+            # read only the key of the middle record
+            start = data + unpack(mapped, header.size + middle * offset.size)[0]
+            if mapped[start:mapped.find('\0', start)] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, key):
+        """
+        key: utf-8 encoded bytes
+        Returns the index of the record for key, or -1 if missing.
+        """
+        i = self.bisect(key)
+        if i < self.length and self.key(i) == key:
+            return i
+        return -1
+
+    def get(self, key, default=None):
+        """
+        Returns the unicode value for unicode key, or default if missing.
+        """
+        i = self.find(key.encode('utf8'))
+        if i < 0:
+            return default
+        found = self.record(i)
+        return found[found.index('\0') + 1:].decode('utf8')
+
+    def items(self):
+        """
+        Yields every (key, value) pair in key order.
+        """
+        for i in range(self.length):
+            key, value = self.record(i).split('\0', 1)
+            yield key.decode('utf8'), value.decode('utf8')
+
+    def close(self):
+        self.buffer.close()
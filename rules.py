@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Grapheme-to-IPA rules for the Fragments of a Root, written as data, and the engine that applies them.
+
+A rule is a (pattern, output) pair. A pattern is a dict mapping context features to the value,
+or tuple of values, they must have; the empty pattern always matches. Rules are tried in order
+and the first matching rule gives the output:
+    a string: appended to the ipa
+    Replace(string): replaces the ipa, including any stress mark
+    a list of Steps: the fragment is transcribed as the concatenation of its sub-fragments
+
+Context features:
+    rootstart, rootend: whether the Frag is the first or last Frag of its Root
+    nearstart: whether the Frag is the first or second Frag of its Root
+    finalstress: whether the Word has a stressed suffix
+    prevfrag, prevstring: kind and string of the previous Frag (prevfrag is None at the start of the Root)
+    prevlast: last letter of the previous Frag
+    nextfrag, nextpart: kind of the next Frag in the Root, or of the next Part if the Frag ends the Root
+    nextstring, nextprefix: string (and its first three letters) of the next Frag or Part
+    nextletter: first letter of whatever follows the Frag
+    endofel: whether the Frag is the end of an element
+
+compile_rule turns the rules for one kind of Frag and one string into a single dispatch entry,
+memoized per (kind, string), so applying a rule costs one dict lookup plus the few tests of that
+string's own rules, however many rules there are.
+"""
+from collections import namedtuple
+
+from dictionaries import *
+from affix import cluster_start_matcher, cluster_end_matcher
+
+# ipa symbols used by the rules, decoded once
+primary_stress = "ˈ".decode('utf8')
+secondary_stress = "ˌ".decode('utf8')
+glottal_stop = "ʔ".decode('utf8')
+long_mark = "ː".decode('utf8')
+tap = "ɾ".decode('utf8')
+ich_laut = "ç".decode('utf8')
+esh = "ʃ".decode('utf8')
+initial_sp = "ʃp".decode('utf8')
+initial_st = "ʃt".decode('utf8')
+tion_vowel = "ĭo".decode('utf8')
+normal_consonant_letters = 'fjklmnpwxzß'.decode('utf8')
+single_cons_clusters = frozenset([u"kk", u"bb", u"dt", u"dd", u"gg"])
+
+# Replace(string): output that replaces the ipa built so far
+Replace = namedtuple('Replace', 'string')
+
+# Step(kind, string, keepstress, nextletter): a sub-fragment of a Frag, transcribed with the rules for kind.
+# The Frag's own stress mark is not repeated; finalstress is passed on only if keepstress;
+# nextletter, if not '', overrides the next letter seen by the sub-fragment.
+Step = namedtuple('Step', 'kind string keepstress nextletter')
+
+# output of a Frag that is ignored entirely (not even stressed)
+silent = Replace(u'')
+
+features = ['rootstart', 'rootend', 'nearstart', 'finalstress', 'prevfrag', 'prevstring', 'prevlast',
+            'nextfrag', 'nextpart', 'nextstring', 'nextprefix', 'nextletter', 'endofel']
+feature_index = dict((name, i) for i, name in enumerate(features))
+FINALSTRESS = feature_index['finalstress']
+NEXTLETTER = feature_index['nextletter']
+
+labels = {'Cons': "Cons: ", 'Clust': "Clust: ", 'Vow': "Vowel: ", 'Diph': "Diph: "}
+
+
+# -- the rules --
+
+# rules applied before the main rules of every Frag of a kind
+prefix_rules = {
+    'Cons': [
+        # if next part is stressed suffix, add stress before the consonant
+        ({'finalstress': True, 'rootend': True, 'nextpart': 'Suff'}, primary_stress),
+    ],
+}
+
+# main rules per kind and string
+cons_rules = {
+    # c: 'k' before a back vowel (or at the end of the word), else 'ts'
+    u'c': [({'nextletter': (u'a', u'o', u'u', u'')}, u'k'), ({}, u'ts')],
+    # h: only pronounced at the beginning of a root
+    u'h': [({'rootstart': True}, u'h'), ({}, u'')],
+    # t: "ts" if precedes "io"
+    u't': [({'nextletter': u'i', 'rootend': False, 'nextstring': u'io'}, u'ts'),
+           ({'nextletter': u'i', 'rootend': True, 'nextprefix': u'ion'}, u'ts'),
+           ({}, u't')],
+    u'q': [({'nextletter': u'u'}, u'kv'), ({}, u'Q NO U?')],
+    # TODO 'er'
+    # TODO vanish them if at end of short word
+    u'r': [({}, tap)],
+}
+
+# letters with only one ipa possibility
+for letter in normal_consonant_letters:
+    cons_rules[letter] = [({}, normal_consonants[letter])]
+
+# b, d, g, s, v: unvoiced at the end of an element or before a consonant
+# TODO way to use these rules for some clust combos?
+# TODO bdgs might be followed by consonant -- need to add that stuff to rule
+for letter in u'bdgsv':
+    cons_rules[letter] = [({'endofel': True}, bdgs_uv[letter]),
+                          ({'nextletter': tuple(consonants)}, bdgs_uv[letter]),
+                          ({}, bdgs_v[letter])]
+
+clust_rules = {
+    # "ch": 'x' after a back vowel or "au", else 'ç'
+    u'ch': [({'prevfrag': 'Vow', 'prevstring': (u'a', u'o', u'u')}, u'x'),
+            ({'prevfrag': 'Vow'}, ich_laut),
+            ({'prevfrag': 'Diph', 'prevstring': u'au'}, u'x'),
+            ({}, ich_laut)],
+    # TODO verbs and genitive endings where it is not "ks"!!
+    u'chs': [({}, u'ks')],
+    u'sp': [({'rootstart': True}, initial_sp), ({}, u'sp')],
+    u'st': [({'rootstart': True}, initial_st), ({}, u'st')],
+    # TODO check suffix "chen" -- might have some false positives
+    u'sch': [({}, esh)],
+}
+
+for cluster in easy_clusters:
+    clust_rules[cluster] = [({}, easy_clusters[cluster])]
+
+# can be treated as single consonant: use Cons rule on second consonant
+for cluster in single_cons_clusters:
+    clust_rules[cluster] = [({}, [Step('Cons', cluster[1], True, u'')])]
+
+vow_rules = [
+    # Vow precedes single Cons, ipa is closed vowel, long near the start of an unstressed-suffix word
+    ({'nextfrag': 'Cons', 'finalstress': False, 'nearstart': True}, u'{closed}' + long_mark),
+    ({'nextfrag': 'Cons'}, u'{closed}'),
+    # Vow precedes Clust: 'h' closes vowel, double consonant opens vowel
+    ({'nextfrag': 'Clust', 'nextletter': u'h'}, u'{closed}'),
+    ({'nextfrag': 'Clust'}, u'{open}'),
+    # Vow is end of word or element - only likely vowel is "e" but it would be a Suff rather than Vow
+    # Can't find an example of word like this, so just arbitrarily choosing closed vowel
+    ({}, u'{closed}'),
+]
+
+# if at beginning of root, add glottal
+prefix_rules['Vow'] = [({'rootstart': True}, glottal_stop)]
+
+diph_rules = {
+    # check for "tion"
+    u'io': [({'prevlast': u't', 'nextletter': u'n'}, tion_vowel), ({}, Replace(u"WEIRD DIPH"))],
+}
+
+for diphthong in diphthongs:
+    diph_rules[diphthong] = [({}, diphthongs[diphthong])]
+
+
+def cluster_steps(string):
+    """
+    Breaks a cluster with no rule of its own into sub-fragments, using the most common clusters
+    found at its beginning or end. Returns a list of Steps.
+    """
+    front = len(cluster_start_matcher.longest(string))
+    back = len(cluster_end_matcher.longest(string))
+
+    # if clust found at beginning: clust rule on front, then cons or clust rule on the rest
+    if front > 0:
+        if (len(string) - front) == 1:
+            return [Step('Clust', string[:front], True, u''), Step('Cons', string[front:], True, u'')]
+        return [Step('Clust', string[:front], True, u''), Step('Clust', string[front:], True, u'')]
+
+    # else if clust found at end
+    elif back > 0:
+        if (len(string) - front) == 1:
+            return [Step('Cons', string[:-back], False, string[1]), Step('Clust', string[-back:], True, u'')]
+        return [Step('Clust', string[:-back], False, string[-back]), Step('Clust', string[-back:], True, u'')]
+
+    # TODO what if we get something like Cons + Clust + Cons? Do these exist?
+
+    # no clusters found, use Cons rule on each Cons
+    steps = [Step('Cons', string[c], False, string[c + 1]) for c in range(len(string) - 1)]
+    steps.append(Step('Cons', string[len(string) - 1], True, u''))
+    return steps
+
+
+def rules_for(kind, string):
+    """
+    Returns the ordered rules for a Frag of the given kind and string.
+    """
+    if kind == 'Cons':
+        return cons_rules.get(string, [({}, u"CONSONANT UNACCOUNTED FOR")])
+    elif kind == 'Clust':
+        return clust_rules.get(string) or [({}, cluster_steps(string))]
+    elif kind == 'Vow':
+        # ignore apostrophes
+        if string == "\'":
+            return [({}, silent)]
+        return [(pattern, output.format(closed=closed_vowels[string], open=open_vowels[string]))
+                for pattern, output in vow_rules]
+    else:
+        return diph_rules.get(string, [({}, Replace(u"WEIRD DIPH"))])
+
+
+# -- the compiler --
+
+# how a compiled output is applied
+APPEND, REPLACE, STEPS = range(3)
+
+compiled = {}
+
+# stop memoizing new entries past this many, so hostile input can't grow the table without bound
+compiled_limit = 100000
+
+
+def compile_pattern(pattern):
+    """
+    Returns pattern as a tuple of (feature index, frozenset of allowed values).
+    """
+    tests = []
+    for name, allowed in pattern.items():
+        if not isinstance(allowed, (tuple, list, set, frozenset)):
+            allowed = (allowed,)
+        tests.append((feature_index[name], frozenset(allowed)))
+    return tuple(tests)
+
+
+def compile_output(output):
+    """
+    Returns output as a (code, value) pair: APPEND and REPLACE take a string, STEPS a tuple of Steps.
+    """
+    if isinstance(output, Replace):
+        return REPLACE, output.string
+    elif isinstance(output, list):
+        return STEPS, tuple(output)
+    return APPEND, output
+
+
+def compile_rules(rules):
+    """
+    Returns rules as a tuple of (tests, code, value).
+    """
+    return tuple((compile_pattern(pattern),) + compile_output(output) for pattern, output in rules)
+
+
+def compile_rule(kind, string):
+    """
+    Returns the dispatch entry for a Frag of the given kind and string: a (kind, prefix, main) tuple,
+    where prefix and main are compiled rules, or silent if the Frag is ignored. Entries are memoized.
+    """
+    key = (kind, string)
+    entry = compiled.get(key)
+    if entry is None:
+        rules = rules_for(kind, string)
+        if rules[0][1] is silent:
+            entry = silent
+        else:
+            entry = (kind, compile_rules(prefix_rules.get(kind, [])), compile_rules(rules))
+        if len(compiled) < compiled_limit:
+            compiled[key] = entry
+    return entry
+
+
+# -- the engine --
+
+def apply_rule(entry, context, natural, newipa, debug=False):
+    """
+    Applies a compiled entry (see compile_rule) to a Frag.
+    context: list of feature values; natural: the next letter to use for Steps that don't override it
+    newipa: the stress mark (or '') the Frag starts with
+    Returns the ipa for the Frag.
+    """
+    if entry is silent:
+        return u''
+    kind, prefix, main = entry
+
+    # first matching prefix rule, if any
+    for tests, code, value in prefix:
+        for index, allowed in tests:
+            if context[index] not in allowed:
+                break
+        else:
+            newipa += value
+            break
+
+    # first matching main rule (the last one always matches)
+    for tests, code, value in main:
+        for index, allowed in tests:
+            if context[index] not in allowed:
+                break
+        else:
+            break
+
+    if code == APPEND:
+        newipa += value
+    elif code == REPLACE:
+        newipa = value
+    else:
+        for step in value:
+            subcontext = list(context)
+            subcontext[FINALSTRESS] = context[FINALSTRESS] and step.keepstress
+            subcontext[NEXTLETTER] = step.nextletter or natural
+            subentry = compiled.get((step.kind, step.string)) or compile_rule(step.kind, step.string)
+            newipa += apply_rule(subentry, subcontext, natural, u'', debug)
+
+    if debug:
+        return labels[kind] + newipa + ' '
+    return newipa
+
+
+def stress_mark(finalstress, ipa, each_part, wordindex):
+    """
+    Returns the stress mark for the beginning of a Root: primary at the beginning of the Word
+    or after an unaccented first prefix, secondary otherwise, none if the Word has a stressed suffix.
+    """
+    if finalstress:
+        return u''
+    if wordindex == 0:
+        return primary_stress
+
+    # if Frag follows FIRST Prefix
+    if (wordindex == 1) and (type(each_part[wordindex - 1]).__name__ == 'Pref'):
+
+        # if Prefix has primary stress, give Frag secondary stress, or if Prefix is unaccented, primary stress
+        if primary_stress in ipa[0]:
+            return secondary_stress
+        return primary_stress
+
+    # if doesn't follow first prefix (or any prefix), give secondary stress
+    return secondary_stress
+
+
+def frag_ipa(each_frag, rootindex, finalstress, ipa, each_part, wordlength, wordindex, alreadystress=False, nextletter='', debug=False):
+    """
+    Returns the ipa for the Frag at rootindex in each_frag (a Root of each_part), including any stress.
+    If alreadystress, no stress mark is added; nextletter, if given, overrides the next letter.
+    """
+    frag = each_frag[rootindex]
+    kind = type(frag).__name__
+    entry = compiled.get((kind, frag.string)) or compile_rule(kind, frag.string)
+    if entry is silent:
+        return u''
+
+    rootlength = len(each_frag)
+    previous = each_frag[rootindex - 1]
+    nextfrag = None
+    nextpart = None
+    nextstring = None
+    natural = u''
+
+    # if not end of root, look at next frag for its type and first letter
+    if rootindex < (rootlength - 1):
+        following = each_frag[rootindex + 1]
+        nextfrag = type(following).__name__
+        nextstring = following.string
+        natural = following.string[0]
+        endofel = False
+
+    # if it is the end of both root and word, end of element must be True
+    elif wordindex == (wordlength - 1):
+        endofel = True
+
+    # end of root but not end of word: look to next part; Frag is end of element unless next part is a suffix
+    else:
+        following = each_part[wordindex + 1]
+        nextpart = type(following).__name__
+        nextstring = following.string
+        natural = following.string[0]
+        endofel = (nextpart != 'Suff')
+
+    context = [
+        rootindex == 0,
+        rootindex == (rootlength - 1),
+        rootindex <= 1,
+        finalstress,
+        type(previous).__name__ if rootindex > 0 else None,
+        previous.string,
+        previous.string[-1],
+        nextfrag,
+        nextpart,
+        nextstring,
+        nextstring[:3] if nextstring is not None else None,
+        nextletter or natural,
+        endofel,
+    ]
+
+    stress = u''
+    if (not alreadystress) and (rootindex == 0):
+        stress = stress_mark(finalstress, ipa, each_part, wordindex)
+    return apply_rule(entry, context, natural, stress, debug)
+
+
+def root_ipa(each_frag, finalstress, ipa, each_part, wordlength, wordindex, debug=False):
+    """
+    Returns the ipa for an entire Root, the concatenated ipa of each of its Frags.
+    """
+    newipa = u''
+    for i in range(len(each_frag)):
+        newipa += frag_ipa(each_frag, i, finalstress, ipa, each_part, wordlength, wordindex, debug=debug)
+    return newipa
@@ -0,0 +1,456 @@
+"""
+HTTP transcription service.
+
+    python server.py [--host HOST] [--port PORT] [-j WORKERS] [--queue N] [--batch N] [--wait MS]
+                     [--warmup FILE [--warmup-top N] [--warmup-background]] [--shared-cache MB]
+
+    GET or POST /transcribe    the text is the 'text' query or form field, or else the raw POST body (utf-8,
+                               with a Content-Length of at most max_body_size bytes, else 400 or 413);
+                               format=plain (default) returns one line of ipa per input line,
+                               format=aligned returns each line with its ipa underneath, as germanipa.py prints it
+    GET /stats                 json counters: requests, batches, words, cache hit ratio, rejections,
+                               latency and throughput, the warmup report once it is done, and the
+                               counters of the cache shared by the worker processes
+
+Requests are queued (up to --queue; beyond that the server answers 503) and a single batcher thread
+takes up to --batch queued requests at a time, waiting at most --wait ms for more to arrive.
+Each batch looks up every distinct word of its requests in an ipa cache once, transcribes the misses
+on a process pool of WORKERS processes (or in the batcher thread if WORKERS is 1), and answers every request.
+Words the rules fail on get an empty ipa. The workers share the Words they build through --shared-cache MB
+of shared memory (see shared_cache.py).
+
+With --warmup, the --warmup-top most frequent words of a frequency list (see warmup.py) are put in the cache
+before the server starts; with --warmup-background the server starts at once and a thread fills the cache
+alongside it, running the rules on the pool (or on a process of its own if WORKERS is 1).
+"""
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+import urlparse
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from collections import deque
+from functools import partial
+from Queue import Queue, Empty, Full
+from SocketServer import ThreadingMixIn
+
+from cache import LRUCache
+from ipa_table import ipa_table
+from shared_cache import default_size, shared_cache
+from text import Line, word_ipa
+import warmup
+from wiktionary import wiktionary
+
+# seconds a request may wait for its batch before the server gives up on it
+request_timeout = 30.0
+
+# most bytes of POST body a request may send; larger ones are answered with 413
+max_body_size = 1 << 20
+
+
+class Request(object):
+    """
+    Represents one queued transcription request.
+    """
+    def __init__(self, text, output='plain'):
+        """
+        self.text: unicode text to transcribe
+        self.output: 'plain' or 'aligned'
+        self.done: Event set once self.result (or self.error) is filled in
+        self.started: time the request was queued
+        """
+        self.text = text
+        self.output = output
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = time.time()
+
+
+class Stats(object):
+    """
+    Represents the service counters. Latencies of the last few thousand requests are kept for percentiles.
+    """
+    def __init__(self, window=5000):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.words = 0
+        self.transcribed = 0
+        self.latencies = deque(maxlen=window)
+        self.warmup = None
+
+    def add_batch(self, words, transcribed):
+        """
+        Counts a batch of words, of which transcribed went through the rules.
+        """
+        with self.lock:
+            self.batches += 1
+            self.words += words
+            self.transcribed += transcribed
+
+    def add_request(self, latency, failed=False):
+        """
+        Counts an answered request that took latency seconds.
+        """
+        with self.lock:
+            self.requests += 1
+            if failed:
+                self.failed += 1
+            self.latencies.append(latency)
+
+    def set_warmup(self, report):
+        """
+        Keeps the warmup.Report of the cache warmup.
+        """
+        with self.lock:
+            self.warmup = report
+
+    def add_rejected(self):
+        """
+        Counts a request turned away because the queue was full.
+        """
+        with self.lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        """
+        Returns a dict of every counter, plus latency percentiles (ms) and requests/sec since start.
+        """
+        with self.lock:
+            latencies = sorted(self.latencies)
+            elapsed = time.time() - self.started
+            found = {
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'batches': self.batches,
+                'words': self.words,
+                'transcribed': self.transcribed,
+                'hit_ratio': 1.0 - float(self.transcribed) / self.words if self.words else 0.0,
+                'mean_batch': float(self.requests) / self.batches if self.batches else 0.0,
+                'requests_per_sec': self.requests / elapsed if elapsed else 0.0,
+                'uptime': elapsed,
+            }
+            if self.warmup is not None:
+                found['warmup'] = self.warmup.as_dict()
+        shared = shared_cache.stats()
+        if shared is not None:
+            found['shared_cache'] = shared
+        for name, fraction in [('p50_ms', 0.5), ('p99_ms', 0.99)]:
+            if latencies:
+                found[name] = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+            else:
+                found[name] = 0.0
+        return found
+
+
+class Batcher(threading.Thread):
+    """
+    Takes queued Requests in batches and transcribes each batch in one pass.
+    """
+    def __init__(self, queue, stats, pool=None, max_batch=64, wait=0.005, cache_size=100000):
+        """
+        self.queue: Queue of Requests
+        self.pool: multiprocessing Pool for the rules, or None to run them in this thread
+        self.max_batch: most Requests taken at once
+        self.wait: seconds to wait for more Requests after the first of a batch
+        self.cache: LRUCache of word -> ipa
+        self.lock: Lock held while self.cache is used, as a warmup thread may be filling it
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.queue = queue
+        self.stats = stats
+        self.pool = pool
+        self.max_batch = max_batch
+        self.wait = wait
+        self.cache = LRUCache(maxsize=cache_size)
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                try:
+                    if remaining > 0:
+                        batch.append(self.queue.get(timeout=remaining))
+                    else:
+                        batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                self.transcribe(batch)
+            except Exception as error:
+                for request in batch:
+                    request.error = error
+            for request in batch:
+                request.done.set()
+
+    def transcribe(self, batch):
+        """
+        Fills in the result of every Request in batch, transcribing each distinct uncached word once.
+        """
+        each_lines = []
+        ipas = {}
+        missing = []
+        words = 0
+        with self.lock:
+            for request in batch:
+                lines = request.text.splitlines()
+                each_lines.append(lines)
+                for line in lines:
+                    each_token = Line.split_line(line)
+                    if each_token is None:
+                        continue
+                    for token in each_token[::2]:
+                        if token == '':
+                            continue
+                        words += 1
+                        if token not in ipas:
+                            found = self.cache.get(token)
+                            ipas[token] = found
+                            if found is None:
+                                missing.append(token)
+
+        # the rules run only for words not seen recently
+        if missing:
+            found = self.transcribe_words(missing, self.pool)
+            with self.lock:
+                for token, ipa in zip(missing, found):
+                    ipas[token] = ipa
+                    self.cache.put(token, ipa)
+        self.stats.add_batch(words, len(missing))
+
+        for request, lines in zip(batch, each_lines):
+            each_line = [Line(line, ipas) for line in lines]
+            if request.output == 'aligned':
+                request.result = u''.join(line.format_ipa() for line in each_line)
+            else:
+                request.result = u''.join(line.ipa + u'\n' for line in each_line)
+
+
+    @staticmethod
+    def transcribe_words(words, pool=None):
+        """
+        Returns the ipa of each of words (empty for words the rules fail on), run on pool if it is given.
+        """
+        function = partial(word_ipa, default=u'')
+        if pool is None:
+            return [function(word) for word in words]
+        return pool.map(function, words, max(1, len(words) // 16))
+
+    def warm(self, words, pool=None, chunk_size=500):
+        """
+        Transcribes words (on pool if it is given) into the cache, chunk_size at a time so requests
+        are not kept from the cache for long.
+        Returns the number of words the rules failed on.
+        """
+        failed = 0
+        for i in range(0, len(words), chunk_size):
+            chunk = words[i:i + chunk_size]
+            found = self.transcribe_words(chunk, pool)
+            with self.lock:
+                for word, ipa in zip(chunk, found):
+                    self.cache.put(word, ipa)
+            failed += sum(1 for ipa in found if ipa == u'')
+        return failed
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers /transcribe and /stats. The queue and stats are attributes of the server.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    # send each response in one write, without waiting on delayed acks from keep-alive clients
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        if url.path == '/stats':
+            self.respond(200, json.dumps(self.server.stats.snapshot(), sort_keys=True), 'application/json')
+        elif url.path == '/transcribe':
+            self.transcribe(urlparse.parse_qs(url.query), None)
+        else:
+            self.respond(404, 'not found\n')
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        if url.path != '/transcribe':
+            self.respond(404, 'not found\n')
+            return
+        # a body that isn't read leaves the connection unusable, so it is closed after the error
+        try:
+            length = int(self.headers.getheader('content-length'))
+        except (TypeError, ValueError):
+            length = -1
+        if length < 0:
+            self.close_connection = 1
+            self.respond(400, 'content-length must be a number of bytes\n')
+            return
+        if length > max_body_size:
+            self.close_connection = 1
+            self.respond(413, 'body larger than %d bytes\n' % max_body_size)
+            return
+        body = self.rfile.read(length)
+        fields = urlparse.parse_qs(url.query)
+        if self.headers.gettype() == 'application/x-www-form-urlencoded':
+            form = urlparse.parse_qs(body, keep_blank_values=True)
+            # clients such as curl -d send raw text with this type too; only a form with a text field is a form
+            if 'text' in form:
+                fields.update(form)
+                body = None
+        self.transcribe(fields, body)
+
+    def transcribe(self, fields, body):
+        """
+        fields: dict of query/form fields; body: raw text, or None to use the 'text' field
+        """
+        output = fields.get('format', ['plain'])[0]
+        if output not in ('plain', 'aligned'):
+            self.respond(400, 'format must be plain or aligned\n')
+            return
+        if body is None:
+            body = fields.get('text', [''])[0]
+        try:
+            text = body.decode('utf8')
+        except UnicodeDecodeError:
+            self.respond(400, 'text must be utf-8\n')
+            return
+
+        request = Request(text, output)
+        try:
+            self.server.queue.put_nowait(request)
+        except Full:
+            self.server.stats.add_rejected()
+            self.respond(503, 'queue full\n')
+            return
+        if not request.done.wait(request_timeout):
+            self.server.stats.add_request(time.time() - request.started, failed=True)
+            self.respond(504, 'timed out\n')
+            return
+        self.server.stats.add_request(time.time() - request.started, failed=request.error is not None)
+        if request.error is not None:
+            self.respond(500, '%s\n' % type(request.error).__name__)
+        else:
+            self.respond(200, request.result.encode('utf-8'))
+
+    def respond(self, status, body, content_type='text/plain; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TranscriptionServer(ThreadingMixIn, HTTPServer):
+    """
+    Serves each connection on its own thread; the transcription itself happens in the Batcher.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_warmup(server, frequencies, top, background=False):
+    """
+    Warms the server's cache with the top most frequent of frequencies (see warmup.warm), recording the
+    report in its stats. If background is True, this happens on a thread of its own and the rules run on the
+    server's pool, or on a process of their own if it has none.
+    Returns the warmup thread, or None once the warmup is done.
+    """
+    batcher = server.batcher
+    if not background:
+        report = warmup.warm(frequencies, top, lambda words: batcher.warm(words, server.pool))
+        server.stats.set_warmup(report)
+        return None
+
+    # the process is forked here, before the batcher and request threads are running
+    pool = server.pool
+    if pool is None:
+        pool = multiprocessing.Pool(1)
+
+    def run():
+        try:
+            server.stats.set_warmup(warmup.warm(frequencies, top, lambda words: batcher.warm(words, pool)))
+        finally:
+            if pool is not server.pool:
+                pool.close()
+                pool.join()
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def make_server(host='127.0.0.1', port=8080, workers=1, queue_size=1024, max_batch=64, wait=0.005,
+                frequencies=None, warmup_top=None, warmup_background=False, shared_cache_size=default_size):
+    """
+    Returns a TranscriptionServer with its Batcher started, ready for serve_forever().
+    frequencies: optional list of (word, count), most frequent first, whose warmup_top most frequent words
+        are put in the cache before the Batcher starts (or alongside it, if warmup_background is True)
+    shared_cache_size: bytes of shared memory for the workers to share their Words in (0: none)
+    """
+    # load the shared data before forking so every worker inherits it
+    wiktionary.open()
+    ipa_table.open()
+    pool = None
+    if workers > 1:
+        if shared_cache_size and shared_cache.buffer is None:
+            shared_cache.create(shared_cache_size)
+        pool = multiprocessing.Pool(workers)
+
+    server = TranscriptionServer((host, port), Handler)
+    server.queue = Queue(maxsize=queue_size)
+    server.stats = Stats()
+    server.pool = pool
+    server.batcher = Batcher(server.queue, server.stats, pool, max_batch, wait)
+    if frequencies is not None:
+        start_warmup(server, frequencies, warmup_top, warmup_background)
+    server.batcher.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve German to IPA transcription over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(), help="worker processes for the rules (default: all cores)")
+    parser.add_argument('--queue', type=int, default=1024, help="most requests waiting; more are answered with 503")
+    parser.add_argument('--batch', type=int, default=64, help="most requests transcribed in one batch")
+    parser.add_argument('--wait', type=float, default=5, help="ms to wait for more requests to batch")
+    parser.add_argument('--warmup', default=None, help="frequency list (see warmup.py) to fill the cache from")
+    parser.add_argument('--warmup-top', type=int, default=50000, help="number of words to warm (default: 50000)")
+    parser.add_argument('--warmup-background', action='store_true', help="serve at once, warming alongside")
+    parser.add_argument('--shared-cache', type=int, default=default_size >> 20, metavar='MB',
+                        help="shared memory for the workers' Words (default: %d; 0 turns it off)" % (default_size >> 20))
+    args = parser.parse_args()
+
+    frequencies = None
+    if args.warmup is not None:
+        frequencies = warmup.read_frequencies(args.warmup)
+    server = make_server(args.host, args.port, args.workers, args.queue, args.batch, args.wait / 1000.0,
+                         frequencies, args.warmup_top, args.warmup_background, args.shared_cache << 20)
+    if server.stats.warmup is not None:
+        print server.stats.warmup
+    print 'serving on http://%s:%d/transcribe' % (args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.pool is not None:
+            server.pool.terminate()
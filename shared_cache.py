@@ -0,0 +1,246 @@
+"""
+Cache of Words shared by every worker process of a batch job or server, in one anonymous shared memory map.
+
+The precomputed ipa table already shares the words of wordlist.txt and wiktionary.json between processes;
+any other word is transcribed again by every worker that meets it. With the shared cache created before the
+workers are forked, each worker publishes the Words the rules build for it, and every worker looks there
+before trying the rules.
+
+Layout of the map (integers little-endian):
+    header: number of entries, bytes of the heap used, entries turned away because the cache was full
+    rows: (pid, hits, misses) for each process that has used the cache, each written only by its process
+    slots: (hash, offset) per slot, hash 0 if empty; an entry is found by probing linearly from its crc32
+    heap: the entries, each one key length, record length and crc32 of key + record, then the utf-8 key
+        and record (the record as ipa_table.pack_entry makes it)
+
+Reads take no lock. A writer copies the entry into the heap, then sets its slot's offset, then its hash,
+so readers only find complete entries; an entry whose crc doesn't match (a read racing the write, on a CPU
+that reorders stores) counts as a miss. Writers take one lock to claim a slot and heap space.
+Entries are never removed: once the slots or the heap are full, further Words are not published.
+
+    shared_cache.create()    in the parent, before the workers are forked
+    shared_cache.stats()     entries, occupancy and hit ratio over every process
+"""
+import mmap
+import multiprocessing
+import os
+import struct
+import zlib
+
+import ipa_table
+import split
+
+header = struct.Struct('<III')
+row = struct.Struct('<QQQ')
+counter = struct.Struct('<Q')
+slot = struct.Struct('<II')
+word_offset = struct.Struct('<I')
+entry_header = struct.Struct('<HHI')
+
+# bytes of shared memory created by default (pages are only allocated as they are used)
+default_size = 64 << 20
+
+# most processes whose hits and misses are counted
+max_processes = 256
+
+# slots probed for a key before it is taken to be missing
+max_probes = 32
+
+
+def key_hash(key):
+    """
+    Returns the nonzero 32 bit hash of key (utf-8 bytes) kept in its slot.
+    """
+    return (zlib.crc32(key) & 0xffffffff) or 1
+
+
+class SharedCache(object):
+    """
+    Represents the shared cache. It is disabled until create() is called; processes forked after that
+    share it.
+    """
+    def __init__(self):
+        """
+        self.buffer: the shared mmap, None while the cache is disabled
+        self.lock: multiprocessing Lock held by writers
+        self.size: bytes of self.buffer
+        self.mask: number of slots - 1 (a power of two)
+        self.slots: offset of the slots in self.buffer
+        self.heap: offset of the heap in self.buffer
+        self.pid: the process self.row was claimed for
+        self.row: offset of the counters row of this process, None if every row is taken
+        """
+        self.buffer = None
+        self.lock = None
+        self.size = 0
+        self.mask = 0
+        self.slots = 0
+        self.heap = 0
+        self.pid = None
+        self.row = None
+
+    def create(self, size=default_size):
+        """
+        Allocates an empty cache of size bytes, a sixteenth of them for slots. Replaces any earlier cache
+        in this process; processes already forked keep the old one.
+        """
+        slots = 1
+        while slots * slot.size * 16 < size:
+            slots *= 2
+        self.slots = header.size + max_processes * row.size
+        self.heap = self.slots + slots * slot.size
+        if self.heap >= size:
+            raise ValueError("a shared cache needs more than %d bytes" % size)
+        # an anonymous map is shared with every process forked after it is made
+        self.buffer = mmap.mmap(-1, size)
+        self.lock = multiprocessing.Lock()
+        self.size = size
+        self.mask = slots - 1
+        self.pid = None
+
+    def close(self):
+        """
+        Disables the cache in this process.
+        """
+        if self.buffer is not None:
+            self.buffer.close()
+        self.buffer = None
+
+    def counters(self):
+        """
+        Returns the offset of this process's row of counters, claiming a free one on first use.
+        """
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.row = None
+            with self.lock:
+                for i in range(max_processes):
+                    offset = header.size + i * row.size
+                    if row.unpack_from(self.buffer, offset)[0] == 0:
+                        row.pack_into(self.buffer, offset, pid, 0, 0)
+                        self.row = offset
+                        break
+        return self.row
+
+    def find(self, key):
+        """
+        key: utf-8 bytes
+        Returns the utf-8 record stored for key, or None.
+        """
+        mapped = self.buffer
+        wanted = key_hash(key)
+        i = wanted & self.mask
+        for probe in range(max_probes):
+            found, offset = slot.unpack_from(mapped, self.slots + i * slot.size)
+            if found == 0:
+                return None
+            if (found == wanted) and offset:
+                key_length, record_length, crc = entry_header.unpack_from(mapped, offset)
+                start = offset + entry_header.size
+                if (key_length == len(key)) and (mapped[start:start + key_length] == key):
+                    data = mapped[start:start + key_length + record_length]
+                    if (zlib.crc32(data) & 0xffffffff) != crc:
+                        return None
+                    return data[key_length:]
+            i = (i + 1) & self.mask
+        return None
+
+    def get(self, word):
+        """
+        Returns (ipa, list of simple words, finalstress, source, parts) for word (see ipa_table.unpack_entry),
+        or None if no process has published it.
+        """
+        if (self.buffer is None) or (split.scoring != ipa_table.scoring):
+            return None
+        record = self.find(word.encode('utf8'))
+        offset = self.counters()
+        if offset is not None:
+            # hits are the second field of the row, misses the third
+            offset += 8 if record is not None else 16
+            counter.pack_into(self.buffer, offset, counter.unpack_from(self.buffer, offset)[0] + 1)
+        if record is None:
+            return None
+        return ipa_table.unpack_entry(record.decode('utf8'))
+
+    def put(self, entry):
+        """
+        entry: a Word built by the rules
+        Publishes the entry to every process, unless it is there already or the cache is full.
+        """
+        if (self.buffer is None) or (split.scoring != ipa_table.scoring):
+            return
+        if not (isinstance(entry.fullword, unicode) and ipa_table.storable(entry.fullword)):
+            return
+        key = entry.fullword.encode('utf8')
+        record = ipa_table.pack_entry(entry).encode('utf8')
+        if (len(key) > 0xffff) or (len(record) > 0xffff):
+            return
+        data = entry_header.pack(len(key), len(record), zlib.crc32(key + record) & 0xffffffff) + key + record
+        wanted = key_hash(key)
+        mapped = self.buffer
+        with self.lock:
+            entries, used, refused = header.unpack_from(mapped, 0)
+            position = None
+            if (entries < (self.mask + 1) // 2) and (self.heap + used + len(data) <= self.size):
+                i = wanted & self.mask
+                for probe in range(max_probes):
+                    found, offset = slot.unpack_from(mapped, self.slots + i * slot.size)
+                    if found == 0:
+                        position = self.slots + i * slot.size
+                        break
+                    start = offset + entry_header.size
+                    if (found == wanted) and (mapped[start:start + len(key)] == key):
+                        # another process published it first
+                        return
+                    i = (i + 1) & self.mask
+            if position is None:
+                header.pack_into(mapped, 0, entries, used, refused + 1)
+                return
+            offset = self.heap + used
+            mapped[offset:offset + len(data)] = data
+            word_offset.pack_into(mapped, position + 4, offset)
+            word_offset.pack_into(mapped, position, wanted)
+            header.pack_into(mapped, 0, entries + 1, used + len(data), refused)
+
+    def stats(self):
+        """
+        Returns a dict of the cache's occupancy and of the hits and misses of every process that used it,
+        or None if the cache is disabled.
+        """
+        if self.buffer is None:
+            return None
+        entries, used, refused = header.unpack_from(self.buffer, 0)
+        processes = hits = misses = 0
+        for i in range(max_processes):
+            pid, process_hits, process_misses = row.unpack_from(self.buffer, header.size + i * row.size)
+            if pid:
+                processes += 1
+                hits += process_hits
+                misses += process_misses
+        return {
+            'entries': entries,
+            'slots': self.mask + 1,
+            'occupancy': float(entries) / (self.mask + 1),
+            'heap_used': used,
+            'heap_size': self.size - self.heap,
+            'refused': refused,
+            'processes': processes,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': float(hits) / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def report(self):
+        """
+        Returns the stats as one line of text.
+        """
+        found = self.stats()
+        if found is None:
+            return 'shared cache disabled'
+        return ('shared cache: %(entries)d entries (%(occupancy).1f%% of slots, %(heap_used)d of %(heap_size)d heap '
+                'bytes, %(refused)d refused); %(hits)d hits, %(misses)d misses (%(ratio).1f%%) in %(processes)d '
+                'processes') % dict(found, occupancy=100 * found['occupancy'], ratio=100 * found['hit_ratio'])
+
+
+shared_cache = SharedCache()
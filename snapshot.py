@@ -0,0 +1,89 @@
+"""
+Versioned binary snapshot of the prepared dictionary tables, for fast startup.
+
+The snapshot holds the decoded unicode tables from dictionaries.py, written with marshal.
+It is only used while it matches the format version, the Python version and the size and
+modification time of dictionaries.py; otherwise dictionaries.py decodes its tables again
+and writes a new snapshot.
+
+    python snapshot.py    rebuilds tables.snapshot
+"""
+import marshal
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+snapshot_path = os.path.join(here, "tables.snapshot")
+sources = [os.path.join(here, "dictionaries.py")]
+
+magic = 'GIPS'
+version = 3
+
+# names of the decoded lists and dicts in dictionaries.py that go into the snapshot
+list_names = ['consonants', 'all_clust']
+dict_names = ['prefixes', 'insep_prefixes', 'suffixes', 'stressed_suffixes', 'endings', 'closed_vowels',
+              'open_vowels', 'normal_consonants', 'diphthongs', 'easy_clusters']
+
+loaded = None
+
+
+def fingerprint():
+    """
+    Returns a tuple identifying the snapshot format and the current state of the source files.
+    """
+    stamp = [magic, version, tuple(sys.version_info[:2])]
+    for path in sources:
+        stat = os.stat(path)
+        stamp.append((os.path.basename(path), stat.st_size, int(stat.st_mtime)))
+    return tuple(stamp)
+
+
+def load(path=snapshot_path):
+    """
+    Returns the snapshot contents (a dict with 'lists' and 'dicts'), or None if the snapshot
+    is missing, unreadable or stale. The file is read at most once per process.
+    """
+    global loaded
+    if loaded is None:
+        try:
+            with open(path, 'rb') as f:
+                if marshal.load(f) != fingerprint():
+                    return None
+                loaded = marshal.load(f)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+    return loaded
+
+
+def save(path=snapshot_path):
+    """
+    Writes a new snapshot of the dictionaries.py tables.
+    Returns False (leaving no partial file) if the snapshot can't be written.
+    """
+    import dictionaries
+
+    # dicts are stored as item lists in the order dictionaries.py inserts them (the order of its ipa_ dicts),
+    # so rebuilding them with dict() gives the same iteration order as decoding the sources
+    contents = {
+        'lists': dict((name, getattr(dictionaries, name)) for name in list_names),
+        'dicts': dict((name, [(k.decode('utf8'), v.decode('utf8')) for k, v in getattr(dictionaries, 'ipa_' + name).items()])
+                      for name in dict_names)
+    }
+    temp = path + '.tmp%d' % os.getpid()
+    try:
+        with open(temp, 'wb') as f:
+            marshal.dump(fingerprint(), f, 2)
+            marshal.dump(contents, f, 2)
+        os.rename(temp, path)
+    except (IOError, OSError):
+        if os.path.exists(temp):
+            os.remove(temp)
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    if save():
+        print 'wrote the dictionaries.py tables to %s' % snapshot_path
+    else:
+        sys.exit('could not write the dictionaries.py tables to %s' % snapshot_path)
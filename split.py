@@ -1,15 +1,129 @@
-with open("wordlist.txt") as f:
-    language = [line.rstrip().decode('utf8') for line in f]
+import math
+import time
 
+import lexicon
 
-def split_word(word):
-    for i in range(len(word)):
-        if word[:i] in language:
-            if word[i:] in language:
-                return [word[:i], word[i:]]
-            else:
-                split = split_word(word[i:])
-                if len(split) > 1:
-                    return [word[:i]] + split
-    return [word]
+# the Lexicon is memory-mapped from lexicon.pack (built from wordlist.txt when stale), so processes share it
+language = lexicon.load()
+
+# how split_word chooses between several valid splits: 'first', 'fewest', 'longest' or 'frequency'
+scoring = 'first'
+
+# word -> count, used by the 'frequency' scoring rule
+frequencies = {}
+
+# work budget for one split_word call; None means no limit. A word over budget is not split at all.
+max_length = 100    # letters
+max_states = 10000  # candidate parts examined
+max_time = 0.05     # seconds
+
+# number of split_word calls that ran over budget and fell back to the whole word
+fallbacks = 0
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised inside split_word when a word runs over the work budget.
+    """
+
+
+def part_cost(part, rule):
+    """
+    Returns the cost of using part in a split under the given scoring rule. Lower is better.
+        'first': every split costs the same, so the first split found wins
+            (shortest first part, then shortest second part, ...)
+        'fewest': each part costs 1, so the split with the fewest parts wins
+        'longest': each part costs minus its length squared, so splits with long parts win
+        'frequency': each part costs minus the log of its frequency, so splits into common words win
+    """
+    if rule == 'first':
+        return 0
+    elif rule == 'fewest':
+        return 1
+    elif rule == 'longest':
+        return -len(part) ** 2
+    elif rule == 'frequency':
+        return -math.log(frequencies.get(part, 0) + 1)
+    raise ValueError("unknown scoring rule: %r" % rule)
 
+
+def split_word(word, rule=None):
+    """
+    Splits word into two or more Lexicon words, choosing the best split according to rule
+    (defaults to the module-level scoring rule).
+    Each position of word is solved once, so the work is bounded by O(n^2) Lexicon lookups,
+    and by the max_length, max_states and max_time budget: a word over budget is counted in
+    fallbacks and left whole, so it is transcribed by the rules alone.
+    Returns a list of the parts, or [word] if no split exists.
+    """
+    global fallbacks
+    if rule is None:
+        rule = scoring
+    length = len(word)
+    if (max_length is not None) and (length > max_length):
+        fallbacks += 1
+        return [word]
+    memo = {}
+    states = 0
+    deadline = None if max_time is None else time.time() + max_time
+
+    def position(start):
+        """
+        Returns a frame for splitting word[start:] into one or more Lexicon words:
+        [start, candidate ends of the first part, best (cost, parts) so far or None, end being tried or None].
+        """
+        found = None
+
+        # the rest of the word as a single part (the whole word is never its own split)
+        if start > 0 and word[start:] in language:
+            found = (part_cost(word[start:], rule), [word[start:]])
+
+        if found is None or rule != 'first':
+            candidates = iter(language.prefix_ends(word, start, length - 1))
+        else:
+            candidates = iter(())
+        return [start, candidates, found, None]
+
+    # each position is solved once, into memo, as (cost, parts) or None. Positions are solved depth first on
+    # an explicit stack, so a long word can't run into the recursion limit; ties go to the candidate found first.
+    stack = [position(0)]
+    rest = None
+    try:
+        while True:
+            frame = stack[-1]
+            start, candidates, found, i = frame
+            if i is not None:
+                # rest is the best split of word[i:]
+                frame[3] = None
+                if rest is not None:
+                    cost = part_cost(word[start:i], rule) + rest[0]
+                    if found is None or cost < found[0]:
+                        frame[2] = found = (cost, [word[start:i]] + rest[1])
+                        if rule == 'first':
+                            frame[1] = candidates = iter(())
+            i = next(candidates, None)
+            if i is None:
+                memo[start] = rest = found
+                stack.pop()
+                if not stack:
+                    break
+                continue
+
+            # charge each candidate to the budget, checking the clock every 64
+            states += 1
+            if (max_states is not None) and (states > max_states):
+                raise BudgetExceeded()
+            if (deadline is not None) and (states % 64 == 0) and (time.time() > deadline):
+                raise BudgetExceeded()
+
+            frame[3] = i
+            if i in memo:
+                rest = memo[i]
+            else:
+                stack.append(position(i))
+    except BudgetExceeded:
+        fallbacks += 1
+        return [word]
+    if rest is None:
+        return [word]
+    return rest[1]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Checks that the precomputed table is only used while it matches its sources.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ipa_table
+from ipa_table import IpaTable, source_hash, version_key
+from packed import write_table
+
+
+class StaleTableTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sources = ipa_table.sources
+        # hash a copy of wiktionary.py instead, so it can be changed
+        original = os.path.join(ipa_table.here, 'wiktionary.py')
+        self.copy = os.path.join(self.directory, 'wiktionary.py')
+        shutil.copy(original, self.copy)
+        ipa_table.sources = [self.copy if path == original else path for path in self.sources]
+        self.target = os.path.join(self.directory, 'ipa.pack')
+        write_table(self.target, [(version_key, unicode(source_hash())),
+                                  (u'haus', u'haʊ̯s\thaus\t0\twiktionary\troot:haus')])
+
+    def tearDown(self):
+        ipa_table.sources = self.sources
+        shutil.rmtree(self.directory)
+
+    def test_sources_include_wiktionary_and_packed(self):
+        names = [os.path.basename(path) for path in self.sources]
+        self.assertIn('wiktionary.py', names)
+        self.assertIn('packed.py', names)
+
+    def test_current_table_is_used(self):
+        self.assertEqual(IpaTable(self.target).get(u'haus')[0], u'haʊ̯s')
+
+    def test_changing_wiktionary_py_makes_table_stale(self):
+        with open(self.copy, 'a') as f:
+            f.write('\n# changed\n')
+        self.assertIsNone(IpaTable(self.target).get(u'haus'))
+
+
+if __name__ == '__main__':
+    unittest.main()
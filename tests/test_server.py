@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Checks the ways the server takes the text of a request.
+
+    python -m unittest discover tests
+"""
+import os
+import socket
+import sys
+import threading
+import unittest
+import urllib
+import urllib2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from server import make_server
+from text import Text
+
+
+class TranscribeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server(port=0, workers=1)
+        cls.url = 'http://127.0.0.1:%d/transcribe' % cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.expected = u''.join(line.ipa + u'\n' for line in Text(u'Guten Morgen').each_line).encode('utf8')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def post(self, data, content_type=None):
+        request = urllib2.Request(self.url, data)
+        if content_type is not None:
+            request.add_header('Content-Type', content_type)
+        return urllib2.urlopen(request).read()
+
+    def test_raw_text_with_form_content_type(self):
+        # what curl -d and urllib2 send by default
+        self.assertEqual(self.post('Guten Morgen'), self.expected)
+
+    def raw_post(self, headers, body=''):
+        """
+        Sends a POST with the given header lines and returns the status line of the response.
+        """
+        connection = socket.create_connection(self.server.server_address, timeout=3)
+        try:
+            connection.sendall('POST /transcribe HTTP/1.1\r\nHost: localhost\r\n%s\r\n%s' % (
+                ''.join(header + '\r\n' for header in headers), body))
+            return connection.makefile('rb').readline().rstrip('\r\n')
+        finally:
+            connection.close()
+
+    def test_bad_content_length(self):
+        for headers in (['Content-Length: abc'], ['Content-Length: -1'], []):
+            self.assertEqual(self.raw_post(headers, 'Guten Morgen'), 'HTTP/1.1 400 Bad Request')
+
+    def test_body_too_large(self):
+        length = server.max_body_size + 1
+        self.assertEqual(self.raw_post(['Content-Length: %d' % length]), 'HTTP/1.1 413 Request Entity Too Large')
+
+    def test_raw_text_with_plain_content_type(self):
+        self.assertEqual(self.post('Guten Morgen', 'text/plain; charset=utf-8'), self.expected)
+
+    def test_form_text_field(self):
+        self.assertEqual(self.post(urllib.urlencode({'text': 'Guten Morgen'})), self.expected)
+
+    def test_query_text_field(self):
+        self.assertEqual(urllib2.urlopen(self.url + '?text=Guten+Morgen').read(), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Checks that split_word handles words of any length.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import split
+
+
+class LongWordTest(unittest.TestCase):
+    def setUp(self):
+        self.budget = split.max_length, split.max_states, split.max_time
+
+    def tearDown(self):
+        split.max_length, split.max_states, split.max_time = self.budget
+
+    def test_longer_than_recursion_limit_without_budget(self):
+        split.max_length = split.max_states = split.max_time = None
+        word = u'haus' * sys.getrecursionlimit()
+        self.assertEqual(split.split_word(word), [u'haus'] * sys.getrecursionlimit())
+
+    def test_over_states_budget_falls_back(self):
+        split.max_length = split.max_time = None
+        split.max_states = 10
+        fallbacks = split.fallbacks
+        word = u'haus' * 50
+        self.assertEqual(split.split_word(word), [word])
+        self.assertEqual(split.fallbacks, fallbacks + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Checks reading word frequency lists.
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warmup import read_frequencies, warm
+
+
+class FrequenciesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'frequencies.tsv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, text):
+        with io.open(self.path, 'w', encoding='utf8') as f:
+            f.write(text)
+        return read_frequencies(self.path)
+
+    def test_header_and_bad_counts_are_skipped(self):
+        found = self.read(u'word\tcount\nund\t30\nhaus\tviele\nstraße\t50\nder\n')
+        self.assertEqual(found, [(u'straße', 50), (u'und', 30), (u'der', 1)])
+
+    def test_expected_coverage(self):
+        report = warm([(u'und', 3), (u'haus', 1)], top=1, transcribe=lambda words: 0)
+        self.assertEqual(report.words, 1)
+        self.assertEqual(report.expected_coverage, 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
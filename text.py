@@ -1,46 +1,273 @@
 # -*- coding: utf-8 -*-
 from part import *
 from split import split_word
-import re
-import string
-
+import split
+from cache import LRUCache
+from affix import AffixTrie, prefix_matcher, suffix_matcher, stressed_suffix_matcher
+from wiktionary import wiktionary
+from ipa_table import ipa_table
+from shared_cache import shared_cache
+from word_store import word_store
+from collections import OrderedDict
+from functools import partial
 import json
+import multiprocessing
+import sys
+import tokenizer
+
+# leading stress marks and glottal stops, matched at the start of a Word's ipa
+accent_matcher = AffixTrie([primary_stress + glottal_stop, primary_stress])
+
+# surface form -> Word, shared by every Text in the process
+word_cache = LRUCache(maxsize=20000)
+
+# where a Word's ipa came from
+wiktionary_source = 'wiktionary'
+rules_source = 'rules'
+
+# fields of each record given by Line.records, in order
+record_fields = ('line', 'start', 'end', 'word', 'ipa', 'source', 'parts')
+
+# formats of write_records
+record_formats = ('jsonl', 'tsv')
+
+# a record as a line of json, keys in the order of record_fields; strings are quoted with json_string
+json_position = u'{"line":%d,"start":%d,"end":%d,'
+json_word = u'"word":%s,"ipa":%s,"source":"%s","parts":[%s]}\n'
+json_string = json.encoder.encode_basestring
+
+# most distinct words write_records keeps the formatted fields of
+formatted_size = 100000
+
+
+def get_word(string):
+    """
+    Returns the Word for string, building it only if it is not already in word_cache.
+    """
+    word = word_cache.get(string)
+    if word is None:
+        word = Word(string)
+        word_cache.put(string, word)
+    return word
+
+
+def word_ipa(string, default=None):
+    """
+    Returns the ipa of string (a pool worker function for transcribe_words),
+    or default if it is not None and the rules fail on string.
+    """
+    if default is None:
+        return get_word(string).ipa
+    try:
+        return get_word(string).ipa
+    except IndexError:
+        return default
+
+
+def transcribe_words(tokens, workers=1, default=None):
+    """
+    tokens: iterable of word strings, possibly repeating
+    Transcribes each distinct string once, on workers processes if workers > 1.
+    default: if not None, the ipa given to words the rules fail on instead of raising
+    Returns a list of the ipa of each token, in the order of tokens.
+    """
+    tokens = list(tokens)
+    forms = list(OrderedDict.fromkeys(tokens))
+    if workers > 1 and len(forms) > 1:
+        pool = multiprocessing.Pool(workers)
+        try:
+            ipas = pool.map(partial(word_ipa, default=default), forms, max(1, len(forms) // (workers * 4)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        ipas = [word_ipa(form, default) for form in forms]
+    found = dict(zip(forms, ipas))
+    return [found[token] for token in tokens]
+
+
+def transcribe_lines(lines, workers=1):
+    """
+    lines: list of unicode lines
+    Transcribes each distinct word of lines once (see transcribe_words).
+    Returns a list of Lines built from the precomputed ipa.
+    """
+    tokens = []
+    for line in lines:
+        each_token = Line.split_line(line)
+        if each_token is not None:
+            tokens.extend(token for token in each_token[::2] if token != '')
+    ipas = dict(zip(tokens, transcribe_words(tokens, workers)))
+    return [Line(line, ipas) for line in lines]
+
+
+def format_record(record, output_format='jsonl', formatted=None):
+    """
+    record: a tuple of record_fields, as given by Line.records
+    formatted: optional dict of word -> its word, ipa, source and parts fields already formatted,
+        which is filled and reused (a word always has the same ipa, source and parts)
+    Returns the record as a line of json (an object with the record_fields as keys)
+    or of tab-separated values (parts written as kind:string, separated by '|').
+    """
+    line, start, end, word, ipa, source, parts = record
+    fields = formatted.get(word) if formatted is not None else None
+    if fields is None:
+        if output_format == 'tsv':
+            parts = u'|'.join(kind + u':' + string for kind, string in parts)
+            fields = u'%s\t%s\t%s\t%s\n' % (word, ipa, source, parts)
+        else:
+            parts = u','.join(u'["%s",%s]' % (kind, json_string(string)) for kind, string in parts)
+            fields = json_word % (json_string(word), json_string(ipa), source, parts)
+        if formatted is not None:
+            formatted[word] = fields
+    if output_format == 'tsv':
+        return u'%d\t%d\t%d\t' % (line, start, end) + fields
+    return json_position % (line, start, end) + fields
+
+
+def write_records(records, out=sys.stdout, output_format='jsonl', header=True, buffer_size=65536):
+    """
+    Writes each record (see Line.records) to out as utf-8, in output_format ('jsonl' or 'tsv').
+    header: if True and output_format is 'tsv', the field names are written first
+    Records are written in blocks of about buffer_size characters rather than one write per record.
+    Returns the number of records written.
+    """
+    block = []
+    size = 0
+    count = 0
+    formatted = {}
+    if header and output_format == 'tsv':
+        block.append(u'\t'.join(record_fields) + u'\n')
+    for record in records:
+        if len(formatted) >= formatted_size:
+            formatted.clear()
+        string = format_record(record, output_format, formatted)
+        block.append(string)
+        size += len(string)
+        count += 1
+        if size >= buffer_size:
+            out.write(u''.join(block).encode('utf-8'))
+            block = []
+            size = 0
+    if block:
+        out.write(u''.join(block).encode('utf-8'))
+    return count
 
-with open('wiktionary.json') as f:
-    wiktionary = json.load(f)
 
 class Text(object):
     """
     Represents an entire German text.
     """
-    def __init__(self, user_input):
+    def __init__(self, user_input, profile=False, align=True):
         """
         self.fulltext: a string representing the entire german text
         self.each_line: a list containing each Line object of text
+        self.recomputed: the number of Lines built by the last create_each_line (or update)
+        self.align: if False, the Lines are not laid out for printing (only records are wanted)
+        profile: if True, the time spent in each stage is added to instrument.stats
         """
         self.fulltext = user_input
-        self.each_line = self.create_each_line(self.fulltext)
-
-    def create_each_line(self, fulltext):
+        self.recomputed = 0
+        self.align = align
+        if profile:
+            import instrument
+            with instrument.profiling(reset=False):
+                self.each_line = self.create_each_line(self.fulltext)
+        else:
+            self.each_line = self.create_each_line(self.fulltext)
+
+    def create_each_line(self, fulltext, previous=None):
         """
         fulltext: a string containing multiple lines of text
+        previous: optional dict mapping line strings to Lines already built for them, which are reused
         Returns each_line, a list containing multiple Line objects
+        Sets self.recomputed to the number of Lines actually built (a repeated line is built once)
         """
+        if previous is None:
+            previous = {}
         each_string = fulltext.splitlines()
         each_line = []
+        self.recomputed = 0
         for line in each_string:
-            each_line.append(Line(line))
+            found = previous.get(line)
+            if found is None:
+                found = Line(line, align=self.align)
+                previous[line] = found
+                self.recomputed += 1
+            each_line.append(found)
         return each_line
 
-    def print_ipa(self):
+    def update(self, user_input):
+        """
+        Replaces the text with user_input (e.g. after an edit), building Lines only for line strings
+        that are not already in the text and reusing the others, wherever they have moved.
+        Returns the number of Lines built.
+        """
+        previous = dict((line.full_line, line) for line in self.each_line)
+        self.fulltext = user_input
+        self.each_line = self.create_each_line(self.fulltext, previous)
+        return self.recomputed
+
+    def records(self):
+        """
+        Yields a record (see Line.records) for each word of the text, offsets counted from the start of fulltext.
+        """
+        offset = 0
+        for number, (line, ending) in enumerate(zip(self.each_line, self.fulltext.splitlines(True))):
+            for record in line.records(number, offset):
+                yield record
+            offset += len(ending)
+
+    @staticmethod
+    def iter_strings(stream):
+        """
+        stream: a file object (utf-8 bytes or unicode) or any iterable of lines
+        Yields (line, offset) for each line of stream (without its line break) as soon as it has been read,
+        where offset is the number of characters of stream before it.
+        """
+        if hasattr(stream, 'readline'):
+            stream = iter(stream.readline, stream.read(0))
+        offset = 0
+        for chunk in stream:
+            if isinstance(chunk, str):
+                chunk = chunk.decode('utf8')
+            for line in chunk.splitlines(True):
+                yield line.splitlines()[0], offset
+                offset += len(line)
+
+    @staticmethod
+    def iter_lines(stream, align=True):
+        """
+        stream: a file object (utf-8 bytes or unicode) or any iterable of lines
+        Yields a Line for each line of stream as soon as it has been read and transcribed,
+        so only one line is held in memory at a time.
+        """
+        for line, offset in Text.iter_strings(stream):
+            yield Line(line, align=align)
+
+    @staticmethod
+    def iter_records(stream, number=0, offset=0):
+        """
+        stream: a file object (utf-8 bytes or unicode) or any iterable of lines
+        Yields a record (see Line.records) for each word of stream as soon as its line has been transcribed,
+        lines numbered from number and offsets counted from offset.
+        """
+        for line, start in Text.iter_strings(stream):
+            for record in Line(line, align=False).records(number, offset + start):
+                yield record
+            number += 1
+
+    def print_ipa(self, width=None):
         """
         Prints each Line of text with ipa underneath.
+        If width is given, long Lines are wrapped into blocks at most width characters wide.
         """
         for line in self.each_line:
             if not (line.adjustedline.isspace() or (line.adjustedline == '')):
-                print (line.adjustedline)
-                print (line.ipa)
-                print (' ')
+                for adjustedline, ipa in line.wrap(width):
+                    print (adjustedline)
+                    print (ipa)
+                    print (' ')
             else:
                 print (line.adjustedline)
 
@@ -54,118 +281,268 @@ class Text(object):
             else:
                 print (line.adjustedline)
 
+    def print_records(self, output_format='jsonl'):
+        """
+        Prints a record for each word of text, as json lines or tab-separated values (see write_records).
+        """
+        write_records(self.records(), sys.stdout, output_format)
+
+
+def transcribe_stream(fileobj, out=sys.stdout, dict_format=False, width=None, output_format=None):
+    """
+    Reads fileobj line by line and writes each transcribed Line to out as utf-8,
+    in the format of Text.print_ipa (or Text.print_dict_ipa if dict_format is True).
+    width: if given, long Lines are wrapped into blocks at most width characters wide (not in dict_format)
+    output_format: if 'jsonl' or 'tsv', a record is written for each word instead (see write_records)
+    """
+    if output_format in record_formats:
+        write_records(Text.iter_records(fileobj), out, output_format)
+        return
+    for line in Text.iter_lines(fileobj):
+        if dict_format:
+            out.write(line.format_dict_ipa().encode('utf-8'))
+        else:
+            out.write(line.format_ipa(width).encode('utf-8'))
+
 
 class Line(object):
     """
     Represents one line of a German text.
     """
-    def __init__(self, line):
+    def __init__(self, line, ipas=None, align=True):
         """
         self.full_line: a string of german text
         self.each_word: a list containing Word objects and strings of punctuation/whitespace
+            (or, if ipas is given, word strings in place of the Word objects)
         self.ipa: a string of ipa for the entire line
+        self.columns: a list of (text, ipa) pairs of equal length, one per Word; joined, they make
+            self.adjustedline and self.ipa
+        ipas: optional dict mapping each word string of line to its precomputed ipa
+        align: if False, the columns, adjustedline and ipa are left empty (see records)
         """
         self.full_line = line
         self.adjustedline = ''
-        self.each_word = self.create_each_word(self.full_line)
-        self.ipa = self.create_ipa(self.each_word)
-
+        self.columns = []
+        if ipas is None:
+            self.each_word = self.create_each_word(self.full_line)
+        else:
+            self.each_word = self.split_line(self.full_line)
+        self.ipa = self.create_ipa(self.each_word, ipas) if align else ''
+
+    @staticmethod
+    def split_line(full_line):
+        """
+        Splits a line at each run of punctuation, digits or whitespace
+        Returns a list of word strings (or empty strings) alternating with strings of punctuation/whitespace,
+        or None if the line is blank
+        """
+        if full_line.isspace():
+            return None
+        return tokenizer.split(full_line)
 
     def create_each_word(self, full_line):
         """
-        Splits a line at each occurrence of punctuation or whitespace
+        Splits a line at each run of punctuation, digits or whitespace
         Returns a list of Word objects alternating with strings of punctuation/whitespace
         """
-        if full_line.isspace():
+        wordlist = self.split_line(full_line)
+        if wordlist is None:
             return None
 
-        each_word = []
-
-        punc = string.punctuation.replace("\'", "")
-        punc += '1234567890'
-        wordlist = re.split("([" + punc + "|\s]+)", full_line)
-
-        for i in range(len(wordlist)):
-            if i % 2 == 0:  # even numbered index is Word or empty string
-                if wordlist[i] != '':
-                    each_word.append(Word(wordlist[i]))
-                else:
-                    each_word.append(wordlist[i])
-            else:
-                each_word.append(wordlist[i])
-
+        # words are at the even indices; empty strings there stay as they are
+        each_word = list(wordlist)
+        for i in range(0, len(wordlist), 2):
+            if wordlist[i] != '':
+                each_word[i] = get_word(wordlist[i])
         return each_word
 
-    def create_ipa(self, each_word):
+    def records(self, number=0, offset=0):
         """
-        Concatenates each Word's ipa into one string
-        Sets Line.adjustedline to be a string whose words line up properly with Line.ipa
+        number: the number of this Line in its text
+        offset: the number of characters of the text before this Line
+        Yields a tuple of record_fields for each word of the Line:
+            line: number
+            start, end: offsets of the word in the text
+            word: the word as written
+            ipa: its ipa
+            source: wiktionary_source or rules_source
+            parts: a tuple of (kind, string) for each Part of the word, kind being 'pref', 'root' or 'suff'
+        """
+        if self.each_word is None:
+            return
+        # words are at the even indices, each followed by the separators up to the next word
+        start = offset
+        for i in range(0, len(self.each_word), 2):
+            entry = self.each_word[i]
+            if entry != '':
+                if not isinstance(entry, Word):
+                    entry = get_word(entry)
+                yield number, start, start + len(entry.fullword), entry.fullword, entry.ipa, entry.source, entry.parts
+                start += len(entry.fullword)
+            if i + 1 < len(self.each_word):
+                start += len(self.each_word[i + 1])
+
+    def create_ipa(self, each_word, ipas=None):
+        """
+        Lays out each Word's ipa (or, for word strings, its ipa from ipas) in a column under the Word
+        Sets Line.columns, and Line.adjustedline to be a string whose words line up properly with Line.ipa
         Returns a string of ipa for the entire Line
+        Both strings are joined once from their columns, so the cost is linear in the length of the line.
         """
         # check if line is blank
         if each_word is None:
             return ''
 
-        # declare ipa and adjustedline
-        ipa = ''
-        adjustedline = ''
-
-        # combine words and punctuation and figure out length
+        columns = []
         for w in range(len(each_word)):
             if isinstance(each_word[w], Word):
-                try:
-                    combo = each_word[w].fullword + each_word[w+1]
-                except IndexError:
-                    combo = each_word[w].fullword
-
-                textlen = len(combo)  # length of word + punctuation/whitespace
-                ipalen = len(each_word[w].ipa) + 1  # length of ipa + one space
-
-                # does ipa have leading accents or glottals?
-                accents = ["ˈʔ".decode('utf8'), "ˈ".decode('utf8')]
-                frontlen = len(filter(each_word[w].ipa.startswith,accents+[''])[0])
-                adjustedline += ' ' * frontlen
-
-                # calculate difference in length
-                diff = ipalen - (textlen + frontlen)
-
-                if diff == 0:  # same length
-                    ipa += each_word[w].ipa + ' '
-                    adjustedline += combo
-
-                elif diff > 0:  # ipa is longer
-                    ipa += each_word[w].ipa + ' '
-                    adjustedline += combo
-                    adjustedline += ' ' * diff
-
-                else:  # line is longer
-                    ipa += each_word[w].ipa + ' '
-                    adjustedline += combo
-                    ipa += ' ' * -diff
-        self.adjustedline = adjustedline
-        return ipa
+                fullword = each_word[w].fullword
+                wordipa = each_word[w].ipa
+            elif (ipas is not None) and (w % 2 == 0) and (each_word[w] != ''):
+                fullword = each_word[w]
+                wordipa = ipas[fullword]
+            else:
+                continue
+
+            # combine words and punctuation and figure out length
+            try:
+                combo = fullword + each_word[w+1]
+            except IndexError:
+                combo = fullword
+
+            textlen = len(combo)  # length of word + punctuation/whitespace
+            ipalen = len(wordipa) + 1  # length of ipa + one space
+
+            # does ipa have leading accents or glottals?
+            frontlen = len(accent_matcher.longest(wordipa))
+
+            # calculate difference in length
+            diff = ipalen - (textlen + frontlen)
+
+            text = ' ' * frontlen + combo
+            ipa = wordipa + ' '
+            if diff > 0:  # ipa is longer
+                text += ' ' * diff
+            elif diff < 0:  # line is longer
+                ipa += ' ' * -diff
+            columns.append((text, ipa))
+
+        self.columns = columns
+        self.adjustedline = ''.join(text for text, ipa in columns)
+        return ''.join(ipa for text, ipa in columns)
+
+    def wrap(self, width=None):
+        """
+        Breaks the Line between Words into blocks at most width characters wide (ignoring trailing spaces);
+        a single Word wider than width gets a block of its own.
+        Returns a list of (adjustedline, ipa) pairs, just [(self.adjustedline, self.ipa)] if width is None.
+        """
+        if (width is None) or (len(self.columns) < 2):
+            return [(self.adjustedline, self.ipa)]
+        blocks = []
+        texts = []
+        ipas = []
+        used = 0
+        for text, ipa in self.columns:
+            if texts and used + max(len(text.rstrip()), len(ipa.rstrip())) > width:
+                blocks.append((''.join(texts), ''.join(ipas)))
+                texts = []
+                ipas = []
+                used = 0
+            texts.append(text)
+            ipas.append(ipa)
+            used += len(text)
+        blocks.append((''.join(texts), ''.join(ipas)))
+        return blocks
+
+    def blank(self):
+        """
+        Returns True if the Line has no text to transcribe.
+        """
+        return self.adjustedline.isspace() or (self.adjustedline == '')
+
+    def format_ipa(self, width=None):
+        """
+        Returns the Line with its ipa underneath, as printed by Text.print_ipa
+        (wrapped into blocks at most width characters wide, if width is given).
+        """
+        if self.blank():
+            return self.adjustedline + '\n'
+        return ''.join(adjustedline + '\n' + ipa + '\n \n' for adjustedline, ipa in self.wrap(width))
+
+    def format_dict_ipa(self):
+        """
+        Returns the Line and its ipa separated by a tab, as printed by Text.print_dict_ipa.
+        """
+        if self.blank():
+            return self.adjustedline + '\n'
+        return self.adjustedline + '\t' + self.ipa + '\n'
 
 class Word(object):
     """
     Represents one german word.
     """
-    def __init__(self, string):
+    def __init__(self, string, lookup=True):
         '''
         self.finalstress: boolean intially set to False. If a stressed suffix is found, it is changed to True.
         self.fullword: string that is a single German word.
         self.each_simple: list of "simple" word strings that combine to form "compound" word self.fullword.
             GermanWordSplitter module splits self.fullword and returns list (can be one element).
         self.each_part: list of each Part that makes up the self.fullword (can be list of one element).
+            Built on first use if the Word was found in the precomputed ipa_table.
         self.length: number of Parts in each_part.
+        self.parts: tuple of (kind, string) for each Part, kind being 'pref', 'root' or 'suff'
+            (from the precomputed ipa_table if the Word was found there, so each_part need not be built).
         self.ipa: string that is the IPA pronunciation of self.fullword
+        self.source: wiktionary_source if self.ipa is Wiktionary's, rules_source if the rules made it
+        lookup: if False, neither the precomputed ipa_table, the shared_cache nor the word_store is consulted
+            (used when compiling the table)
         '''
-        self.finalstress = False
         self.fullword = string
+        self._each_part = None
+        self._parts = None
+
+        # words in the precomputed table, published by another worker, or saved by an earlier run,
+        # skip splitting and the rules
+        found = None
+        if lookup:
+            found = ipa_table.get(string)
+            if found is None:
+                found = shared_cache.get(string)
+            if found is None:
+                found = word_store.get(string)
+        if found is not None:
+            self.ipa, self.each_simple, self.finalstress, self.source, self._parts = found
+            return
+
+        self.finalstress = False
+        self.source = rules_source
+        fallbacks = split.fallbacks
         self.each_simple = split_word(self.fullword)
-        self.each_part = self.create_each_part()
-        self.length = len(self.each_part)
+        self._each_part = self.create_each_part()
         self.ipa = self.create_ipa()
 
+        # a word split_word gave up on may split differently with more time, so it isn't saved
+        if lookup and (split.fallbacks == fallbacks):
+            shared_cache.put(self)
+            word_store.put(self)
+
+    @property
+    def each_part(self):
+        if self._each_part is None:
+            self._each_part = self.create_each_part()
+        return self._each_part
+
+    @property
+    def length(self):
+        return len(self.each_part)
+
+    @property
+    def parts(self):
+        if self._parts is None:
+            self._parts = tuple((type(part).__name__.lower(), part.string) for part in self.each_part)
+        return self._parts
+
     def create_each_part(self):
         '''
         Searches each "simple" word for prefixes and suffixes.
@@ -183,7 +560,7 @@ class Word(object):
 
             # if part is less than 5 letters, no need to look for prefs and suffs
             if len(part) < 5:
-                if part in prefixes.keys():  # simple word could be a separable prefix
+                if part in prefixes:  # simple word could be a separable prefix
                     each_part.append(Pref([part]))
                 else:
                     each_part.append(Root(part))
@@ -191,7 +568,7 @@ class Word(object):
             # else if part is 5 or more letters
             else:
                 # check if separable prefix
-                if part in prefixes.keys():
+                if part in prefixes:
 
                     # hold onto prefix until we know if next part is prefix or starts with insep. prefix
                     prefix_buff.append(part)
@@ -204,11 +581,11 @@ class Word(object):
                     # TODO check for issues : herz?
                     # check for prefixes
                     while True:
-                        pref = root[:len(filter(root.startswith,prefixes.keys()+[''])[0])]
+                        pref = prefix_matcher.longest(root)
                         if pref == '':
                             break
                         prefix_buff.append(pref)
-                        root = root[len(filter(root.startswith,prefixes.keys()+[''])[0]):]
+                        root = root[len(pref):]
 
                     # add any buffered prefixes to each_frag and empty buffer
                     if prefix_buff != []:
@@ -219,13 +596,13 @@ class Word(object):
                     while True:
 
                         # look for stressed suffs
-                        breakpoint = len(filter(root.endswith,stressed_suffixes.keys()+[''])[0])
+                        breakpoint = len(stressed_suffix_matcher.longest(root))
 
                         # if not stressed
                         if (breakpoint == 0):
 
                             # look for unstressed stuffs
-                            breakpoint = len(filter(root.endswith,suffixes.keys()+[''])[0])
+                            breakpoint = len(suffix_matcher.longest(root))
 
                             # no suffs found, stop looking
                             if (breakpoint == 0):
@@ -265,15 +642,14 @@ class Word(object):
             i: the specific Part's index in self.each_part.
         Returns ipa string for entire Word.
         '''
-        try:
-            a = wiktionary[self.fullword][0]
-            b = a.split("/")
-            return b[1]
-        except:
-            ipa = []
-            for i in range(self.length):
-                ipa.append(self.each_part[i].ipa_rule(self.finalstress, ipa, self.each_part, self.length, i))
-            ipa_string = ''
-            for partipa in ipa:
-                ipa_string += partipa
-            return ipa_string
\ No newline at end of file
+        override = wiktionary.ipa(self.fullword)
+        if override is not None:
+            self.source = wiktionary_source
+            return override
+        ipa = []
+        for i in range(self.length):
+            ipa.append(self.each_part[i].ipa_rule(self.finalstress, ipa, self.each_part, self.length, i))
+        ipa_string = ''
+        for partipa in ipa:
+            ipa_string += partipa
+        return ipa_string
\ No newline at end of file
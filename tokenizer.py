@@ -0,0 +1,24 @@
+"""
+Tokenizer for lines of text, with its pattern compiled once at import.
+
+split() gives a single line as words alternating with separators, which is all Line needs. Words are runs
+of anything but ASCII punctuation (except the apostrophe and backslash, which belong to words), digits,
+spaces and tabs; separators are runs of those. The line is split in one call to the compiled pattern.
+"""
+import re
+import string
+
+# ASCII punctuation but for the apostrophe and the backslash, which count as word characters
+# (the backslash always has: the per-line pattern this replaces used it to escape ']')
+punctuation = string.punctuation.replace("'", "").replace("\\", "").decode('ascii')
+
+# a run of separators between two words of a line
+separators = re.compile(u'([ \t0-9%s]+)' % re.escape(punctuation))
+
+
+def split(line):
+    """
+    Returns line (without line breaks) as a list of word strings (or u'' where there is none) alternating
+    with separator strings, each a run of punctuation, digits and whitespace: the words are at even indices.
+    """
+    return separators.split(line)
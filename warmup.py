@@ -0,0 +1,162 @@
+"""
+Cache warmup from a word frequency list.
+
+Right after startup every common word misses the caches in front of Word, so the first traffic goes through
+the rules. Warming transcribes the most frequent words of a frequency list ahead of time:
+    warm(frequencies)                 fills text.word_cache (and the word_store, if enabled) in this process
+    server.py --warmup FILE           fills the server's ipa cache before it serves, or alongside serving
+                                      with --warmup-background
+Each warmup reports how long it took and its expected coverage: the share of the counted words that the
+warmed words make up, which is the hit rate to expect on traffic like the counted corpus (not a measured one).
+
+A frequency list is a utf-8 file of word<TAB>count lines, most frequent first; lines whose count is not
+a number (such as a header) are skipped and counted on stderr. Build one from corpora or
+logs (with --column N, only the Nth tab-separated field of each line is read, counting from 0):
+
+    python warmup.py count [--column N] [--top N] [--out FILE] FILE...
+    python warmup.py warm [--top N] FILE      warms this process from FILE and prints the report
+"""
+import argparse
+import io
+import sys
+import time
+from collections import Counter
+
+from text import Line, get_word, word_cache
+
+
+class Report(object):
+    """
+    Represents the result of a warmup.
+    """
+    def __init__(self, words, failed, seconds, expected_coverage):
+        """
+        self.words: number of words transcribed
+        self.failed: how many of them the rules failed on
+        self.seconds: time the warmup took
+        self.expected_coverage: share of the counted words that the warmed words make up, the hit rate to
+            expect on traffic like the counted corpus (computed from the list, not measured)
+        """
+        self.words = words
+        self.failed = failed
+        self.seconds = seconds
+        self.expected_coverage = expected_coverage
+
+    def as_dict(self):
+        return {'words': self.words, 'failed': self.failed, 'seconds': self.seconds,
+                'expected_coverage': self.expected_coverage}
+
+    def __str__(self):
+        return 'warmed %d words (%d failed) in %.2f s; expected coverage %.1f%% (their share of the counted words)' % (
+            self.words, self.failed, self.seconds, 100.0 * self.expected_coverage)
+
+
+def count_words(lines, column=None):
+    """
+    lines: iterable of unicode lines of text
+    column: if given, only the column-th tab-separated field of each line is counted (lines without one are skipped)
+    Returns a Counter of word -> number of occurrences.
+    """
+    counts = Counter()
+    for line in lines:
+        if column is not None:
+            fields = line.rstrip(u'\r\n').split(u'\t')
+            if len(fields) <= column:
+                continue
+            line = fields[column]
+        each_token = Line.split_line(line.rstrip(u'\r\n'))
+        if each_token is not None:
+            counts.update(token for token in each_token[::2] if token != '')
+    return counts
+
+
+def write_frequencies(frequencies, out=sys.stdout):
+    """
+    frequencies: list of (word, count)
+    Writes a word<TAB>count line for each, as utf-8.
+    """
+    for word, count in frequencies:
+        out.write((u'%s\t%d\n' % (word, count)).encode('utf-8'))
+
+
+def read_frequencies(path):
+    """
+    Returns the list of (word, count) of the frequency list at path, most frequent first
+    (words of equal count in file order). A word without a count counts once; lines whose count is not
+    a number are skipped, and how many were is written to stderr.
+    """
+    frequencies = []
+    skipped = 0
+    with io.open(path, encoding='utf8') as f:
+        for line in f:
+            fields = line.rstrip(u'\r\n').split(u'\t')
+            if fields[0] == u'':
+                continue
+            try:
+                count = int(fields[1]) if len(fields) > 1 else 1
+            except ValueError:
+                skipped += 1
+                continue
+            frequencies.append((fields[0], count))
+    if skipped:
+        sys.stderr.write('%s: skipped %d lines without a word<TAB>count\n' % (path, skipped))
+    frequencies.sort(key=lambda item: -item[1])
+    return frequencies
+
+
+def warm_words(words):
+    """
+    Builds the Word of each of words into text.word_cache (and the word_store, if enabled).
+    Returns the number of words the rules failed on.
+    """
+    failed = 0
+    for word in words:
+        try:
+            get_word(word)
+        except IndexError:
+            failed += 1
+    return failed
+
+
+def warm(frequencies, top=None, transcribe=warm_words):
+    """
+    frequencies: list of (word, count), most frequent first
+    top: number of words to warm (default: all)
+    transcribe: function that transcribes a list of words into a cache and returns how many failed
+    Returns a Report.
+    """
+    chosen = frequencies[:top]
+    total = sum(count for word, count in frequencies)
+    start = time.time()
+    failed = transcribe([word for word, count in chosen])
+    seconds = time.time() - start
+    expected_coverage = float(sum(count for word, count in chosen)) / total if total else 0.0
+    return Report(len(chosen), failed, seconds, expected_coverage)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build word frequency lists and warm the transcription caches.")
+    commands = parser.add_subparsers(dest='command')
+    counter = commands.add_parser('count', help="count the words of corpora or logs into a frequency list")
+    counter.add_argument('files', nargs='+', help="input files (utf-8)")
+    counter.add_argument('--column', type=int, default=None, help="count only this tab-separated field (from 0)")
+    counter.add_argument('--top', type=int, default=None, help="keep only the N most frequent words")
+    counter.add_argument('--out', default=None, help="output file (default: stdout)")
+    warmer = commands.add_parser('warm', help="warm this process from a frequency list and print the report")
+    warmer.add_argument('frequencies', help="frequency list (word<TAB>count per line)")
+    warmer.add_argument('--top', type=int, default=word_cache.maxsize,
+                        help="number of words to warm (default: the word cache size, %d)" % word_cache.maxsize)
+    args = parser.parse_args()
+
+    if args.command == 'count':
+        counts = Counter()
+        for path in args.files:
+            with io.open(path, encoding='utf8') as f:
+                counts.update(count_words(f, args.column))
+        out = sys.stdout if args.out is None else open(args.out, 'w')
+        # most frequent first, then alphabetical, so the same corpus always gives the same list
+        write_frequencies(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:args.top], out)
+        if out is not sys.stdout:
+            out.close()
+    else:
+        print warm(read_frequencies(args.frequencies), args.top)
@@ -0,0 +1,93 @@
+"""
+Wiktionary IPA overrides, compiled from wiktionary.json into a packed table (see packed.py).
+
+    python wiktionary.py    rebuilds wiktionary.pack from wiktionary.json
+"""
+import json
+import os
+
+from packed import PackedTable, write_table
+
+here = os.path.dirname(os.path.abspath(__file__))
+json_path = os.path.join(here, "wiktionary.json")
+table_path = os.path.join(here, "wiktionary.pack")
+
+
+def build(source=json_path, target=table_path):
+    """
+    Compiles the Wiktionary json file (word -> list of transcriptions) into a packed table.
+    Each word's transcriptions are stored newline-separated.
+    """
+    with open(source) as f:
+        entries = json.load(f)
+    write_table(target, ((word, u'\n'.join(transcriptions)) for word, transcriptions in entries.items()))
+
+
+class WiktionaryStore(object):
+    """
+    Represents the Wiktionary overrides. Nothing is read until the first lookup.
+    Uses the packed table when it is at least as new as the json file, rebuilding it if needed;
+    if the table can't be written, falls back to loading the json file.
+    """
+    def __init__(self, source=json_path, target=table_path):
+        """
+        self.source: path of wiktionary.json
+        self.target: path of the packed table
+        self.table: PackedTable or dict of the overrides, None until first use
+        """
+        self.source = source
+        self.target = target
+        self.table = None
+
+    def open(self):
+        """
+        Opens (building if stale) the packed table, or loads the json file if that fails.
+        Returns the table.
+        """
+        if self.table is None:
+            try:
+                if (not os.path.exists(self.target)) or (os.path.getmtime(self.target) < os.path.getmtime(self.source)):
+                    build(self.source, self.target)
+                self.table = PackedTable(self.target)
+            except (IOError, OSError, ValueError):
+                with open(self.source) as f:
+                    self.table = {word: u'\n'.join(transcriptions) for word, transcriptions in json.load(f).items()}
+        return self.table
+
+    def get(self, word, default=None):
+        """
+        Returns the list of Wiktionary transcriptions for word, or default if it has none.
+        """
+        found = self.open().get(word)
+        if found is None:
+            return default
+        return found.split(u'\n')
+
+    def __getitem__(self, word):
+        found = self.get(word)
+        if found is None:
+            raise KeyError(word)
+        return found
+
+    def __contains__(self, word):
+        return word in self.open()
+
+    def ipa(self, word):
+        """
+        Returns the phonemic IPA (between slashes) of word's first Wiktionary transcription,
+        or None if there is none.
+        """
+        found = self.open().get(word)
+        if found is None:
+            return None
+        try:
+            return found.split(u'\n', 1)[0].split(u'/')[1]
+        except IndexError:
+            return None
+
+
+wiktionary = WiktionaryStore()
+
+if __name__ == "__main__":
+    build()
+    print 'wrote %s' % table_path
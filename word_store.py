@@ -0,0 +1,167 @@
+"""
+Optional persistent transcription cache, shared by every run and process that uses the same file (sqlite).
+
+The precomputed ipa table only holds the words of wordlist.txt and wiktionary.json; every other word
+(mostly compounds) goes through split_word and the rules again on each run. With the store enabled,
+a Word the rules built is saved, and later runs read it back before the rules are tried.
+The store records the hash of the sources its entries were made from (see ipa_table.source_hash); the first
+process to open it after the rules, dictionaries.py, wordlist.txt or wiktionary.json change clears it.
+
+New entries are written in batches of batch_size, and when the process exits. Several processes can use
+one file at once: sqlite locks it while a batch is written, and readers don't wait for writers
+(write-ahead log). The store is a cache: if the file can't be opened or written, words are just transcribed.
+
+    python ipa_print.py --cache words.db "..."
+    python word_store.py PATH     prints the number of entries in the store
+"""
+import os
+import sqlite3
+import sys
+from multiprocessing.util import Finalize
+
+import ipa_table
+import split
+
+# entries held back before they are written
+batch_size = 200
+
+# seconds a process waits for another one's write to finish
+timeout = 30.0
+
+schema = [
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS words (word TEXT PRIMARY KEY, record TEXT NOT NULL)',
+]
+
+
+class WordStore(object):
+    """
+    Represents the persistent cache. It is disabled until enable() is given a path; nothing is opened
+    until the first lookup. Each process opens its own connection, also after a fork, and only the thread
+    that opened it can use it (in other threads lookups miss).
+    """
+    def __init__(self, path=None):
+        """
+        self.path: path of the sqlite file, None if the store is disabled
+        self.connection: sqlite3 connection, False if the file can't be used, None until first use
+        self.pid: the process the connection belongs to
+        self.pending: dict of word -> record not yet written
+        """
+        self.path = path
+        self.connection = None
+        self.pid = None
+        self.pending = {}
+
+    def enable(self, path):
+        """
+        Uses the store at path from now on (None disables it).
+        """
+        self.close()
+        self.path = path
+
+    def open(self):
+        """
+        Opens the store in this process, clearing it first if its entries are from other sources.
+        Returns the connection, or False.
+        """
+        if (self.connection is not None) and (self.pid != os.getpid()):
+            # a connection must not be used across a fork; entries pending in the parent are its own
+            self.connection = None
+            self.pending = {}
+        if self.connection is None:
+            self.connection = False
+            self.pid = os.getpid()
+            try:
+                connection = sqlite3.connect(self.path, timeout=timeout)
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+                with connection:
+                    for statement in schema:
+                        connection.execute(statement)
+                    version = unicode(ipa_table.source_hash())
+                    found = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                    if (found is None) or (found[0] != version):
+                        connection.execute('DELETE FROM words')
+                        connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+            except sqlite3.Error:
+                return self.connection
+            self.connection = connection
+            Finalize(self, self.flush, exitpriority=10)
+        return self.connection
+
+    def get(self, word):
+        """
+        Returns (ipa, list of simple words, finalstress, source, parts) for word (see ipa_table.unpack_entry),
+        or None if it is not in the store.
+        """
+        if (self.path is None) or (split.scoring != ipa_table.scoring):
+            return None
+        record = self.pending.get(word)
+        if record is None:
+            connection = self.open()
+            if connection is False:
+                return None
+            try:
+                found = connection.execute('SELECT record FROM words WHERE word = ?', (word,)).fetchone()
+            except sqlite3.Error:
+                return None
+            if found is None:
+                return None
+            record = found[0]
+        return ipa_table.unpack_entry(record)
+
+    def put(self, entry):
+        """
+        entry: a Word built by the rules
+        Holds the entry back to be written with the next batch.
+        """
+        if (self.path is None) or (split.scoring != ipa_table.scoring):
+            return
+        if not (isinstance(entry.fullword, unicode) and ipa_table.storable(entry.fullword)):
+            return
+        if self.pid != os.getpid():
+            self.open()
+        self.pending[entry.fullword] = ipa_table.pack_entry(entry)
+        if len(self.pending) >= batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes every pending entry in one transaction. If that fails they are dropped.
+        """
+        if not self.pending or (self.pid != os.getpid()):
+            return
+        pending, self.pending = self.pending, {}
+        connection = self.open()
+        if connection is False:
+            return
+        try:
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO words VALUES (?, ?)', pending.items())
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        """
+        Writes pending entries and closes the connection of this process.
+        """
+        self.flush()
+        if self.connection and (self.pid == os.getpid()):
+            self.connection.close()
+        self.connection = None
+
+    def count(self):
+        """
+        Returns the number of entries in the store.
+        """
+        connection = self.open()
+        if connection is False:
+            return 0
+        return connection.execute('SELECT COUNT(*) FROM words').fetchone()[0]
+
+
+word_store = WordStore()
+
+if __name__ == "__main__":
+    word_store.enable(sys.argv[1])
+    print '%d words in %s' % (word_store.count(), sys.argv[1])